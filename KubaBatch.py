@@ -0,0 +1,254 @@
+# Author: Andy Phung
+# Date: 10/18/2026
+# Description: Class KubaBatch plays many independent Kuba games in lockstep with NumPy. Every game shares the same
+#              two players and each call to step makes one move in every game at once, following the same rules as
+#              KubaGame.make_move. Single games can be copied to and from KubaGame objects to cross-check results.
+
+import numpy as np
+from KubaGame import BOARD_SIZE, DIRECTIONS, STANDARD_SETUP, STARTING_LAYOUT, ZOBRIST_KEYS, KubaGame
+
+EMPTY, WHITE, BLACK, RED = 0, 1, 2, 3
+MARBLE_CODES = {"X": EMPTY, "W": WHITE, "B": BLACK, "R": RED}
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+_INDEX = np.arange(BOARD_SIZE)
+_SQUARES = np.arange(BOARD_SIZE * BOARD_SIZE)
+
+# Zobrist keys indexed by [marble code, square]; empty squares hash to 0
+_ZOBRIST = np.zeros((4, BOARD_SIZE * BOARD_SIZE), dtype=np.uint64)
+for _marble, _code in MARBLE_CODES.items():
+    if _code != EMPTY:
+        _ZOBRIST[_code] = np.array(ZOBRIST_KEYS[_marble], dtype=np.uint64)
+
+
+def _line_tables():
+    """
+    Builds lookup tables for the line a push travels along, indexed by [direction code, row, column]. Each line is
+    ordered so that index 0 is the edge the marble is pushed towards.
+    :return: A tuple of the line rows and line columns, both shaped (4, 7, 7, 7), and the pushed marble's position in
+             its line, shaped (4, 7, 7)
+    """
+    last = BOARD_SIZE - 1
+    line_rows = np.zeros((4, BOARD_SIZE, BOARD_SIZE, BOARD_SIZE), dtype=np.intp)
+    line_columns = np.zeros((4, BOARD_SIZE, BOARD_SIZE, BOARD_SIZE), dtype=np.intp)
+    positions = np.zeros((4, BOARD_SIZE, BOARD_SIZE), dtype=np.intp)
+    for direction, code in DIRECTION_CODES.items():
+        for row in range(BOARD_SIZE):
+            for column in range(BOARD_SIZE):
+                if direction == "F":
+                    squares, positions[code, row, column] = [(i, column) for i in _INDEX], row
+                elif direction == "B":
+                    squares, positions[code, row, column] = [(last - i, column) for i in _INDEX], last - row
+                elif direction == "L":
+                    squares, positions[code, row, column] = [(row, i) for i in _INDEX], column
+                else:
+                    squares, positions[code, row, column] = [(row, last - i) for i in _INDEX], last - column
+                line_rows[code, row, column] = [square[0] for square in squares]
+                line_columns[code, row, column] = [square[1] for square in squares]
+    return line_rows, line_columns, positions
+
+
+_LINE_ROWS, _LINE_COLUMNS, _LINE_POSITIONS = _line_tables()
+
+
+def hash_boards(boards):
+    """
+    Computes the Zobrist hash of each board, matching KubaGame.position_hash.
+    :param boards: An int8 array of marble codes shaped (N, 7, 7)
+    :return: A uint64 array of N hashes
+    """
+    boards = boards.reshape(len(boards), BOARD_SIZE * BOARD_SIZE)
+    return np.bitwise_xor.reduce(_ZOBRIST[boards, _SQUARES], axis=1)
+
+
+def _try_moves(boards, hashes, games, colors, prev_hashes, directions, rows, columns):
+    """
+    Helper function for KubaBatch that pushes one marble in each of the given games without changing the boards.
+    :param boards: The int8 board array of the batch, shaped (N, 7, 7)
+    :param hashes: The uint64 board hash array of the batch, shaped (N,)
+    :param games: An array of K game indexes, one per move. A game may appear more than once.
+    :param colors: An array of K marble codes of the players making the moves
+    :param prev_hashes: An array of K board hashes after each moving player's previous move, for the ko rule
+    :param directions: An array of K direction codes
+    :param rows: An array of K row numbers, each from 0 to 6
+    :param columns: An array of K column numbers, each from 0 to 6
+    :return: A tuple of a boolean array of K valid moves, the K line rows and line columns shaped (K, 7), the K new
+             lines to write there, the K resulting board hashes, and the K marble codes pushed off the board (EMPTY
+             if none). Moves that push the player's own marble, push in a blocked direction, or break the ko rule are
+             not valid.
+    """
+    count = len(games)
+    moves = np.arange(count)
+    line_rows = _LINE_ROWS[directions, rows, columns]
+    line_columns = _LINE_COLUMNS[directions, rows, columns]
+    positions = _LINE_POSITIONS[directions, rows, columns]
+    lines = boards[games[:, None], line_rows, line_columns]
+
+    # Validate marble and direction
+    behind = lines[moves, np.minimum(positions + 1, BOARD_SIZE - 1)]
+    valid = (lines[moves, positions] == colors) & (positions >= 1)
+    valid &= (positions == BOARD_SIZE - 1) | (behind == EMPTY)
+
+    # Shift the run from the first empty square in front of the marble, or from the edge if there is none
+    last_empty = np.where((lines == EMPTY) & (_INDEX <= positions[:, None]), _INDEX, -1).max(axis=1)
+    captured = np.where(last_empty < 0, lines[:, 0], EMPTY).astype(np.int8)
+    valid &= captured != colors
+    region = (_INDEX >= np.maximum(last_empty, 0)[:, None]) & (_INDEX < positions[:, None])
+    shifted = np.concatenate((lines[:, 1:], np.zeros((count, 1), dtype=np.int8)), axis=1)
+    new_lines = np.where(region, shifted, lines)
+    new_lines[moves, positions] = EMPTY
+
+    # Check ko rule, updating the hash only for the squares of the line
+    squares = line_rows * BOARD_SIZE + line_columns
+    changes = np.bitwise_xor.reduce(_ZOBRIST[lines, squares] ^ _ZOBRIST[new_lines, squares], axis=1)
+    new_hashes = hashes[games] ^ changes
+    valid &= new_hashes != prev_hashes
+    return valid, line_rows, line_columns, new_lines, new_hashes, captured
+
+
+class KubaBatch:
+    """Represents a batch of KubaGame games stored as NumPy arrays and advanced one move per game at a time."""
+    def __init__(self, count, player1, player2):
+        """
+        Creates a batch of games in the opening position.
+        :param count: The number of games as an integer
+        :param player1: A tuple containing the player name and the player's marble color (ex: ('PlayerA','W'))
+        :param player2: A tuple containing the player name and the player's marble color (ex: ('PlayerB','B'))
+        """
+        self._player1 = player1
+        self._player2 = player2
+        self._colors = np.array([MARBLE_CODES[player1[1]], MARBLE_CODES[player2[1]]], dtype=np.int8)
+        start = np.array([[MARBLE_CODES[marble] for marble in row] for row in STARTING_LAYOUT], dtype=np.int8)
+        self.boards = np.repeat(start[None], count, axis=0)
+        self.hashes = np.repeat(hash_boards(start[None]), count)
+        self.prev_hashes = np.repeat(self.hashes[:, None], 2, axis=1)
+        self.banks = np.zeros((count, 2, 2), dtype=np.int16)
+        self.current = np.full(count, -1, dtype=np.int8)
+        self.winner = np.full(count, -1, dtype=np.int8)
+
+    def __len__(self):
+        """Returns the number of games in the batch."""
+        return len(self.boards)
+
+    def step(self, players, rows, columns, directions):
+        """
+        Makes one move in every game.
+        :param players: An array of N player indexes, 0 for player1 and 1 for player2
+        :param rows: An array of N row numbers of the marbles to be moved
+        :param columns: An array of N column numbers of the marbles to be moved
+        :param directions: An array of N direction codes (see DIRECTION_CODES)
+        :return: A boolean array of N values, True where the move was made and False where make_move would have
+                 returned False. Games with a rejected move are unchanged.
+        """
+        players = np.asarray(players, dtype=np.intp)
+        rows = np.asarray(rows, dtype=np.intp)
+        columns = np.asarray(columns, dtype=np.intp)
+        directions = np.asarray(directions, dtype=np.intp)
+
+        # Validate player. As in make_move, the first player to try a move claims the turn even if the move fails.
+        known = (players == 0) | (players == 1)
+        claim = known & (self.winner < 0) & (self.current < 0)
+        self.current[claim] = players[claim]
+        valid = known & (self.winner < 0) & (self.current == players)
+
+        # Validate coordinates and direction code
+        valid &= (rows >= 0) & (rows < BOARD_SIZE) & (columns >= 0) & (columns < BOARD_SIZE)
+        valid &= (directions >= 0) & (directions < len(DIRECTION_CODES))
+
+        # Make move
+        games = np.flatnonzero(valid)
+        movers = players[games]
+        ok, line_rows, line_columns, new_lines, new_hashes, captured = _try_moves(
+            self.boards, self.hashes, games, self._colors[movers], self.prev_hashes[games, movers],
+            directions[games], rows[games], columns[games])
+        valid[games[~ok]] = False
+        games, movers, captured = games[ok], movers[ok], captured[ok]
+        self.boards[games[:, None], line_rows[ok], line_columns[ok]] = new_lines[ok]
+        self.hashes[games] = new_hashes[ok]
+        self.prev_hashes[games, movers] = new_hashes[ok]
+
+        # If a marble was captured, record marble, and evaluate win
+        took = captured != EMPTY
+        bank_slots = np.where(captured == RED, 0, 1)
+        np.add.at(self.banks, (games[took], movers[took], bank_slots[took]), 1)
+        won = (self.banks[games, movers, 0] == 7) | (self.banks[games, movers, 1] == 8)
+
+        # A player left without a legal move loses
+        waiting = ~won
+        won[waiting] = ~self._has_legal_move(games[waiting], 1 - movers[waiting])
+
+        self.winner[games[won]] = movers[won]
+        self.current[games[~won]] = 1 - movers[~won]
+        return valid
+
+    def legal_move_mask(self, player):
+        """
+        Finds the legal moves of one player in every game, ignoring whose turn it is.
+        :param player: The player index, 0 for player1 and 1 for player2
+        :return: A boolean array shaped (N, 4, 7, 7) indexed by [game, direction code, row, column]
+        """
+        games, directions, rows, columns, ok = self._candidate_moves(np.arange(len(self)),
+                                                                     np.full(len(self), player))
+        mask = np.zeros((len(self), len(DIRECTION_CODES), BOARD_SIZE, BOARD_SIZE), dtype=bool)
+        mask[games[ok], directions[ok], rows[ok], columns[ok]] = True
+        return mask
+
+    def _has_legal_move(self, games, players):
+        """Helper function for step that returns, for each of the given games, whether the player has a legal move."""
+        candidate_games, _, _, _, ok = self._candidate_moves(games, players)
+        has_move = np.zeros(len(self), dtype=bool)
+        has_move[candidate_games[ok]] = True
+        return has_move[games]
+
+    def _candidate_moves(self, games, players):
+        """
+        Helper function that tries every direction for every marble of the given player in each of the given games.
+        :return: A tuple of the candidate game indexes, direction codes, rows, columns, and a boolean array that is
+                 True where the candidate is a legal move
+        """
+        colors = self._colors[players]
+        owner, rows, columns = np.nonzero(self.boards[games] == colors[:, None, None])
+        directions = np.repeat(np.arange(len(DIRECTION_CODES)), len(owner))
+        owner, rows, columns = np.tile(owner, 4), np.tile(rows, 4), np.tile(columns, 4)
+        candidate_games = games[owner]
+        ok = _try_moves(self.boards, self.hashes, candidate_games, colors[owner],
+                        self.prev_hashes[candidate_games, players[owner]], directions, rows, columns)[0]
+        return candidate_games, directions, rows, columns, ok
+
+    def get_game(self, index):
+        """
+        Copies one game of the batch into a new KubaGame. The new game has no moves to unmake.
+        :param index: The game index as an integer
+        :return: A KubaGame object in the same position
+        """
+        game = KubaGame(self._player1, self._player2)
+        board = self.boards[index].ravel()
+        game._set_masks({marble: sum(1 << int(square) for square in np.flatnonzero(board == MARBLE_CODES[marble]))
+                         for marble in ("W", "B", "R")})
+        game._p1_prev_hash, game._p2_prev_hash = (int(value) for value in self.prev_hashes[index])
+        game._player1_bank = [int(value) for value in self.banks[index, 0]]
+        game._player2_bank = [int(value) for value in self.banks[index, 1]]
+        players = (self._player1[0], self._player2[0])
+        game._current_player = players[self.current[index]] if self.current[index] >= 0 else None
+        game._winner = players[self.winner[index]] if self.winner[index] >= 0 else None
+        return game
+
+    def set_game(self, index, game):
+        """
+        Copies the position of a KubaGame into one game of the batch.
+        :param index: The game index as an integer
+        :param game: A KubaGame object on the standard board with the same players as the batch
+        """
+        if game.get_setup() != STANDARD_SETUP:
+            raise ValueError("A batch only holds games on the standard board")
+        board = np.zeros(BOARD_SIZE * BOARD_SIZE, dtype=np.int8)
+        for marble, mask in game.get_masks().items():
+            board[[square for square in _SQUARES if mask >> int(square) & 1]] = MARBLE_CODES[marble]
+        self.boards[index] = board.reshape(BOARD_SIZE, BOARD_SIZE)
+        self.hashes[index] = game.position_hash()
+        self.prev_hashes[index] = [game._p1_prev_hash, game._p2_prev_hash]
+        self.banks[index] = [game._player1_bank, game._player2_bank]
+        players = [self._player1[0], self._player2[0]]
+        current, winner = game.get_current_turn(), game.get_winner()
+        self.current[index] = players.index(current) if current is not None else -1
+        self.winner[index] = players.index(winner) if winner is not None else -1
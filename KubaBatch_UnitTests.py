@@ -0,0 +1,77 @@
+import random
+import unittest
+from KubaBenchmark import KO_MOVES
+from KubaGame import KubaGame
+
+try:
+    import numpy as np
+    from KubaBatch import DIRECTION_CODES, KubaBatch
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class UnitTests(unittest.TestCase):
+    def assert_same_game(self, batch, index, game):
+        """Asserts that one game of the batch matches a KubaGame."""
+        copy = batch.get_game(index)
+        for row in range(7):
+            for column in range(7):
+                self.assertEqual(copy.get_marble((row, column)), game.get_marble((row, column)))
+        self.assertEqual(copy.position_hash(), game.position_hash())
+        self.assertEqual(int(batch.hashes[index]), game.position_hash())
+        self.assertEqual((copy._p1_prev_hash, copy._p2_prev_hash), (game._p1_prev_hash, game._p2_prev_hash))
+        self.assertEqual(copy.get_marble_count(), game.get_marble_count())
+        self.assertEqual(copy.get_captured("PlayerA"), game.get_captured("PlayerA"))
+        self.assertEqual(copy.get_captured("PlayerB"), game.get_captured("PlayerB"))
+        self.assertEqual(copy.get_current_turn(), game.get_current_turn())
+        self.assertEqual(copy.get_winner(), game.get_winner())
+
+    def test_opening(self):
+        """Test the readme moves in a batch."""
+        batch = KubaBatch(3, ("PlayerA", "W"), ("PlayerB", "B"))
+        valid = batch.step([0, 0, 1], [6, 6, 6], [5, 5, 5], [DIRECTION_CODES["F"], DIRECTION_CODES["L"], 0])
+        self.assertEqual(valid.tolist(), [True, False, False])
+        self.assertEqual(batch.current.tolist(), [1, 0, 1])
+        self.assertEqual(batch.get_game(0).get_marble((4, 5)), "W")
+        self.assertEqual(batch.get_game(1).get_marble((4, 5)), "X")
+
+    def test_matches_kuba_game(self):
+        """Test random games, including rejected moves, against KubaGame."""
+        rng = random.Random(7)
+        count = 24
+        batch = KubaBatch(count, ("PlayerA", "W"), ("PlayerB", "B"))
+        games = [KubaGame(("PlayerA", "W"), ("PlayerB", "B")) for _ in range(count)]
+        names = ["PlayerA", "PlayerB"]
+        for _ in range(160):
+            moves = []
+            for game in games:
+                player = names.index(game.get_current_turn()) if game.get_current_turn() else rng.randrange(2)
+                legal = game.legal_moves(names[player])
+                if legal and rng.random() < 0.8:
+                    (row, column), direction = rng.choice(legal)
+                else:
+                    player, row, column = rng.randrange(2), rng.randrange(-1, 8), rng.randrange(-1, 8)
+                    direction = rng.choice("FBLR")
+                moves.append((player, row, column, direction))
+            players, rows, columns, directions = zip(*moves)
+            valid = batch.step(players, rows, columns, [DIRECTION_CODES[direction] for direction in directions])
+            for index, (game, (player, row, column, direction)) in enumerate(zip(games, moves)):
+                self.assertEqual(valid[index], game.make_move(names[player], (row, column), direction))
+                self.assert_same_game(batch, index, game)
+        self.assertGreater(int((batch.winner >= 0).sum()), 0)
+
+    def test_legal_move_mask(self):
+        """Test the vectorized legal moves against KubaGame.legal_moves."""
+        batch = KubaBatch(1, ("PlayerA", "W"), ("PlayerB", "B"))
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        for move in KO_MOVES:
+            self.assertTrue(game.make_move(*move))
+        batch.set_game(0, game)
+        self.assert_same_game(batch, 0, game)
+        for player, name in enumerate(["PlayerA", "PlayerB"]):
+            mask = batch.legal_move_mask(player)[0]
+            expected = {((row, column), direction) for direction, code in DIRECTION_CODES.items()
+                        for row in range(7) for column in range(7) if mask[code, row, column]}
+            self.assertEqual(expected, set(game.legal_moves(name)))
+        self.assertFalse(batch.step([0], [1], [1], [DIRECTION_CODES["R"]])[0])    # Ko rule
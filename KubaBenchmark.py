@@ -0,0 +1,204 @@
+# Author: Andy Phung
+# Date: 10/18/2026
+# Description: Performance benchmarks for KubaGame. perft counts the leaf nodes of the full legal move tree from the
+#              opening position to a given depth and checks the counts against committed reference values. The
+#              move benchmarks time single make_move calls for plain pushes in each direction, a capture, and a
+#              move rejected by the ko rule. The board size benchmark replays random games on scaled boards of
+#              several sizes to show how move throughput changes with the board size. Run this file directly to print
+#              a report.
+
+import argparse
+import random
+import time
+from KubaGame import BoardSetup, KubaGame
+
+# Leaf node counts of the legal move tree from the opening position. Either player may make the first move.
+PERFT_REFERENCE = {1: 16, 2: 128, 3: 1280, 4: 12768, 5: 141624}
+
+# A game in which PlayerA wins with a capture on the last move. The unit tests replay this game and KO_MOVES too.
+WINNING_GAME = [("PlayerA", (6, 6), "F"), ("PlayerB", (6, 0), "F"), ("PlayerA", (5, 6), "F"),
+                ("PlayerB", (5, 0), "F"), ("PlayerA", (3, 6), "L"), ("PlayerB", (6, 1), "F"),
+                ("PlayerA", (3, 5), "L"), ("PlayerB", (5, 1), "R"), ("PlayerA", (3, 4), "L"),
+                ("PlayerB", (4, 0), "R"), ("PlayerA", (3, 3), "L"), ("PlayerB", (4, 1), "R"),
+                ("PlayerA", (3, 2), "L"), ("PlayerB", (4, 2), "R"), ("PlayerA", (3, 1), "L"),
+                ("PlayerB", (4, 3), "R"), ("PlayerA", (0, 0), "R"), ("PlayerB", (0, 6), "B"),
+                ("PlayerA", (0, 1), "R"), ("PlayerB", (1, 6), "B"), ("PlayerA", (0, 3), "B"),
+                ("PlayerB", (2, 6), "B"), ("PlayerA", (1, 3), "B"), ("PlayerB", (3, 6), "B"),
+                ("PlayerA", (2, 3), "B"), ("PlayerB", (4, 6), "B"), ("PlayerA", (3, 3), "B"),
+                ("PlayerB", (0, 5), "L"), ("PlayerA", (4, 3), "B")]
+
+# Moves after which the ko rule keeps PlayerA from pushing (1, 1) to the right, with PlayerA playing white
+KO_MOVES = [("PlayerA", (0, 0), "R"), ("PlayerB", (6, 0), "F"), ("PlayerA", (1, 0), "R"),
+            ("PlayerB", (4, 0), "B"), ("PlayerA", (1, 1), "R"), ("PlayerB", (1, 6), "L")]
+
+# Each move benchmark is a list of moves that sets up a position followed by the move that is timed
+MOVE_BENCHMARKS = {
+    "push F": [("PlayerA", (6, 5), "F")],
+    "push B": [("PlayerA", (0, 0), "B")],
+    "push L": [("PlayerA", (5, 6), "L")],
+    "push R": [("PlayerA", (0, 0), "R")],
+    "capture": WINNING_GAME[:7],
+    "ko rejection": KO_MOVES + [("PlayerA", (1, 1), "R")],
+}
+
+
+def new_game(setup=None):
+    """Returns a KubaGame in the opening position with the players used by the benchmarks."""
+    return KubaGame(("PlayerA", "W"), ("PlayerB", "B"), setup)
+
+
+def perft(game, depth):
+    """
+    Counts the leaf nodes of the legal move tree below the current position of a game.
+    :param game: A KubaGame object. It is returned to its starting position when the count is done.
+    :param depth: The number of moves to search as an integer
+    :return: The number of move sequences of exactly the given depth as an integer. Games that are won before the given
+             depth is reached do not count.
+    """
+    if depth == 0:
+        return 1
+    if game.get_winner() is not None:
+        return 0
+
+    current_player = game.get_current_turn()
+    if current_player is None:
+        players = [game._player1[0], game._player2[0]]
+    else:
+        players = [current_player]
+
+    nodes = 0
+    for player_name in players:
+        for coordinates, direction in game.legal_moves(player_name):
+            game.make_move(player_name, coordinates, direction)
+            nodes += perft(game, depth - 1) if depth > 1 else 1
+            game.unmake_move()
+    return nodes
+
+
+def run_perft(max_depth):
+    """
+    Runs perft from the opening position for each depth up to max_depth.
+    :param max_depth: The deepest depth to count as an integer
+    :return: A list of (depth, nodes, seconds, nodes per second, expected nodes) tuples. The expected nodes are None
+             for depths without a reference value.
+    """
+    results = []
+    for depth in range(1, max_depth + 1):
+        start = time.perf_counter()
+        nodes = perft(new_game(), depth)
+        seconds = time.perf_counter() - start
+        results.append((depth, nodes, seconds, nodes / seconds, PERFT_REFERENCE.get(depth)))
+    return results
+
+
+def time_move(moves, repeat=20000):
+    """
+    Times the last move of a move benchmark.
+    :param moves: A list of (player_name, coordinates, direction) tuples. The last move is the one timed.
+    :param repeat: The number of times to make the move as an integer
+    :return: A tuple of the make_move result of the timed move and the number of make_move calls per second. Accepted
+             moves are taken back with unmake_move between calls, and that time is not counted.
+    """
+    game = new_game()
+    for move in moves[:-1]:
+        if not game.make_move(*move):
+            raise ValueError("Benchmark setup move %s was rejected" % (move,))
+    player_name, coordinates, direction = moves[-1]
+
+    result = game.make_move(player_name, coordinates, direction)
+    if result:
+        game.unmake_move()
+    elapsed = 0.0
+    clock = time.perf_counter
+    for _ in range(repeat):
+        start = clock()
+        game.make_move(player_name, coordinates, direction)
+        elapsed += clock() - start
+        if result:
+            game.unmake_move()
+    return result, repeat / elapsed
+
+
+def time_board_size(size, games=20, seed=0, max_moves=200):
+    """
+    Plays random games on the board of BoardSetup.scaled(size) and times replaying their moves.
+    :param size: The odd board size as an integer
+    :param games: The number of games as an integer
+    :param seed: The random seed as an integer
+    :param max_moves: The number of moves after which a game is stopped
+    :return: A tuple of the number of moves, make_move calls per second, moves per second through a trusted
+             apply_moves, and the average number of marbles a move pushes
+    """
+    setup = BoardSetup.scaled(size)
+    rng = random.Random(seed)
+    logs, pushed = [], 0
+    for _ in range(games):
+        game = new_game(setup)
+        player_name, moves = rng.choice(["PlayerA", "PlayerB"]), []
+        while game.get_winner() is None and len(moves) < max_moves:
+            legal = game.legal_moves(player_name)
+            if not legal:
+                break
+            (row, column), direction = move = rng.choice(legal)
+            pushed += bin(game._push(row, column, direction)[0]).count("1")
+            game.make_move(player_name, *move)
+            game.forget_history()
+            moves.append((player_name, move))
+            player_name = game.get_current_turn()
+        logs.append(moves)
+    count = sum(len(moves) for moves in logs)
+
+    elapsed = 0.0
+    clock = time.perf_counter
+    for moves in logs:
+        game = new_game(setup)
+        for player_name, (coordinates, direction) in moves:
+            start = clock()
+            game.make_move(player_name, coordinates, direction)
+            elapsed += clock() - start
+
+    start = clock()
+    for moves in logs:
+        if moves:
+            codes = [setup.encode_move(*move) for _, move in moves]
+            new_game(setup).apply_moves(codes, first_player=moves[0][0])
+    applied = clock() - start
+    return count, count / elapsed, count / applied, pushed / count
+
+
+def main():
+    """Prints the perft and move benchmark report. Exits with an error if a perft count differs from its reference."""
+    parser = argparse.ArgumentParser(description="Benchmark the KubaGame move engine.")
+    parser.add_argument("--depth", type=int, default=4, help="deepest perft depth to run (default: 4)")
+    parser.add_argument("--repeat", type=int, default=20000, help="calls per move benchmark (default: 20000)")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[7, 9, 11, 13],
+                        help="board sizes to compare (default: 7 9 11 13)")
+    args = parser.parse_args()
+
+    mismatches = 0
+    print("%-6s %12s %10s %14s" % ("depth", "nodes", "seconds", "nodes/sec"))
+    for depth, nodes, seconds, rate, expected in run_perft(args.depth):
+        note = ""
+        if expected is not None and nodes != expected:
+            note = "  MISMATCH (expected %d)" % expected
+            mismatches += 1
+        print("%-6d %12d %10.3f %14.0f%s" % (depth, nodes, seconds, rate, note))
+
+    print()
+    print("%-14s %8s %14s" % ("move", "result", "moves/sec"))
+    for name, moves in MOVE_BENCHMARKS.items():
+        result, rate = time_move(moves, args.repeat)
+        print("%-14s %8s %14.0f" % (name, result, rate))
+
+    print()
+    print("%-6s %8s %14s %14s %8s" % ("size", "moves", "moves/sec", "applied/sec", "pushed"))
+    for size in args.sizes:
+        count, rate, applied_rate, pushed = time_board_size(size)
+        print("%-6d %8d %14.0f %14.0f %8.2f" % (size, count, rate, applied_rate, pushed))
+
+    if mismatches:
+        raise SystemExit("%d perft count(s) differ from the reference values" % mismatches)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import unittest
+from KubaBenchmark import MOVE_BENCHMARKS, PERFT_REFERENCE, new_game, perft, time_board_size, time_move
+
+
+class UnitTests(unittest.TestCase):
+    def test_perft_reference(self):
+        """Test perft node counts against the committed reference values."""
+        for depth in range(1, 5):
+            self.assertEqual(perft(new_game(), depth), PERFT_REFERENCE[depth])
+
+    def test_perft_restores_game(self):
+        """Test that perft leaves the game where it started."""
+        game = new_game()
+        self.assertTrue(game.make_move("PlayerA", (6, 5), "F"))
+        before = game.position_hash()
+        self.assertGreater(perft(game, 3), 0)
+        self.assertEqual(game.position_hash(), before)
+        self.assertEqual(game.get_current_turn(), "PlayerB")
+
+    def test_move_benchmarks(self):
+        """Test that each move benchmark times the outcome it is named after."""
+        for name, moves in MOVE_BENCHMARKS.items():
+            result, rate = time_move(moves, repeat=10)
+            self.assertEqual(result, name != "ko rejection", name)
+            self.assertGreater(rate, 0)
+        game = new_game()
+        for move in MOVE_BENCHMARKS["capture"]:
+            self.assertTrue(game.make_move(*move))
+        self.assertEqual(game.get_captured("PlayerA"), 1)
+
+    def test_board_size_benchmark(self):
+        """Test that the board size benchmark replays random games on a scaled board."""
+        count, rate, applied_rate, pushed = time_board_size(9, games=2, max_moves=30)
+        self.assertTrue(0 < count <= 60)
+        self.assertGreater(rate, 0)
+        self.assertGreater(applied_rate, 0)
+        self.assertGreaterEqual(pushed, 1)
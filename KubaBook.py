@@ -0,0 +1,277 @@
+# Author: Andy Phung
+# Date: 10/18/2026
+# Description: Class OpeningBook stores move statistics from recorded games for the first moves of a game. The book
+#              is an open-addressed hash table in a file. Each slot holds a position key, a one-byte move code, and
+#              the number of games that made the move and that were won by the player who made it. The file is
+#              memory-mapped and read slot by slot, so opening a book does no parsing and a lookup only probes a few
+#              slots. New batches of games are merged into the file in place, and the table doubles in size when
+#              it gets more than half full.
+
+import argparse
+import mmap
+import os
+import random
+import struct
+from KubaGame import KubaGame, decode_move, encode_move
+from KubaRecord import ArchiveReader
+from KubaTournament import PLAYER1, PLAYER2, POLICIES, game_seed
+
+# File layout: magic, slot count (a power of 2), and used slot count, followed by the slots
+BOOK_MAGIC = b"KUBABOOK"
+_HEADER = struct.Struct("<8sQQ")
+# Slot: position key (0 for an empty slot), games played, games won by the player who moved, and move code
+_SLOT = struct.Struct("<QIIB3x")
+
+# Mixed into the position hash when the player to move has the black marbles
+_BLACK_KEY = random.Random(0x424F4F4B).getrandbits(64)
+
+
+def position_key(game, player_name):
+    """
+    Returns the book key of a position. It depends on the marbles on the board and the color of the player to move,
+    and it is never 0, which marks an empty slot.
+    """
+    color = game._player1[1] if player_name == game._player1[0] else game._player2[1]
+    return game.position_hash() ^ (_BLACK_KEY if color == "B" else 0) or 1
+
+
+def create_book(path, slots=1 << 16):
+    """
+    Creates or overwrites an empty book file.
+    :param path: The path of the book file
+    :param slots: The number of slots in the table, a power of 2
+    """
+    if slots < 2 or slots & (slots - 1):
+        raise ValueError("The number of slots must be a power of 2")
+    with open(path, "wb") as book:
+        book.write(_HEADER.pack(BOOK_MAGIC, slots, 0))
+        book.truncate(_HEADER.size + slots * _SLOT.size)
+
+
+def game_entries(player1, player2, first_player, codes, max_moves):
+    """
+    Replays a game record and lists the book entries of its first moves.
+    :param player1: A tuple containing the player name and the player's marble color (ex: ('PlayerA','W'))
+    :param player2: A tuple containing the player name and the player's marble color (ex: ('PlayerB','B'))
+    :param first_player: 0 if player1 made the first move, 1 if player2 did
+    :param codes: The one-byte move codes of the game
+    :param max_moves: The number of moves from the start of the game to list
+    :return: A list of (position key, move code, won) tuples, where won is 1 if the player who made the move won
+             the game and 0 otherwise. Raises ValueError if make_move rejects one of the listed moves.
+    """
+    game = KubaGame(player1, player2)
+    player_name = (player1[0], player2[0])[first_player]
+    entries = []
+    for number, code in enumerate(codes[:max_moves]):
+        key = position_key(game, player_name)
+        coordinates, direction = decode_move(code)
+        if not game.make_move(player_name, coordinates, direction):
+            raise ValueError("Move %d %s %s was rejected" % (number, coordinates, direction))
+        entries.append((key, code, player_name))
+        player_name = game.get_current_turn()
+
+    # The rest of the game only decides the winner, so it is replayed without validation
+    game.apply_moves(codes[max_moves:], first_player=player_name)
+    winner = game.get_winner()
+    return [(key, code, int(mover == winner)) for key, code, mover in entries]
+
+
+def self_play(games, policy, seed=0, max_moves=200):
+    """
+    Plays games between two copies of a KubaTournament policy. Player1 makes the first move in even numbered games.
+    :param games: The number of games as an integer
+    :param policy: A KubaTournament policy
+    :param seed: The random seed as an integer
+    :param max_moves: The number of moves after which an unfinished game is stopped without a winner
+    :return: A generator yielding a (player1, player2, first_player, move codes) record for each game
+    """
+    for index in range(games):
+        rng = random.Random(game_seed(seed, index))
+        game = KubaGame(PLAYER1, PLAYER2)
+        first_player = index % 2
+        player_name, codes = (PLAYER1[0], PLAYER2[0])[first_player], bytearray()
+        while game.get_winner() is None and len(codes) < max_moves:
+            coordinates, direction = policy(game, player_name, rng)
+            if not game.make_move(player_name, coordinates, direction):
+                raise ValueError("%s policy made an illegal move %s %s" % (player_name, coordinates, direction))
+            game.forget_history()
+            codes.append(encode_move(coordinates, direction))
+            player_name = game.get_current_turn()
+        yield PLAYER1, PLAYER2, first_player, bytes(codes)
+
+
+class OpeningBook:
+    """Represents a memory-mapped book file."""
+    def __init__(self, path, writable=False):
+        """
+        Opens and memory-maps a book file.
+        :param path: The path of a file made by create_book
+        :param writable: True to allow merging games into the book
+        """
+        self._path = path
+        self._writable = writable
+        self._open()
+
+    def _open(self):
+        """Helper function for __init__ and _grow that maps the book file and reads its header."""
+        with open(self._path, "r+b" if self._writable else "rb") as book:
+            self._map = mmap.mmap(book.fileno(), 0, access=mmap.ACCESS_WRITE if self._writable else mmap.ACCESS_READ)
+        magic, self._slots, self._used = _HEADER.unpack_from(self._map, 0)
+        if magic != BOOK_MAGIC:
+            self._map.close()
+            raise ValueError("%s is not a Kuba opening book" % self._path)
+
+    def __len__(self):
+        """Returns the number of (position, move) entries."""
+        return self._used
+
+    def _probe(self, key):
+        """
+        Helper function that walks the slots of a key with linear probing.
+        :return: A generator yielding (slot offset, slot tuple) until and including the first empty slot
+        """
+        mask = self._slots - 1
+        index = key & mask
+        while True:
+            offset = _HEADER.size + index * _SLOT.size
+            slot = _SLOT.unpack_from(self._map, offset)
+            yield offset, slot
+            if not slot[0]:
+                return
+            index = (index + 1) & mask
+
+    def lookup(self, key):
+        """
+        Reads the entries of one position.
+        :param key: A position key made by position_key
+        :return: A list of (move code, games, wins) tuples
+        """
+        return [(code, games, wins) for _, (slot_key, games, wins, code) in self._probe(key) if slot_key == key]
+
+    def book_moves(self, game, player_name, min_games=1):
+        """
+        Finds the book moves of a player in the current position.
+        :param game: A KubaGame object
+        :param player_name: The name of the player to move
+        :param min_games: The number of games a move needs to be listed
+        :return: A list of ((coordinates, direction), games, win rate) tuples for the legal book moves, most played
+                 first. The list is empty if the position is not in the book.
+        """
+        legal = set(game.legal_moves(player_name))
+        moves = []
+        for code, games, wins in self.lookup(position_key(game, player_name)):
+            move = decode_move(code)
+            if games >= min_games and move in legal:
+                moves.append((move, games, wins / games))
+        moves.sort(key=lambda entry: (-entry[1], -entry[2], entry[0]))
+        return moves
+
+    def best_move(self, game, player_name, min_games=1):
+        """Returns the most played legal book move of the player, or None if there is none."""
+        moves = self.book_moves(game, player_name, min_games)
+        return moves[0][0] if moves else None
+
+    def add(self, key, code, games, wins):
+        """
+        Adds the results of one move to the book.
+        :param key: A position key made by position_key
+        :param code: The one-byte move code
+        :param games: The number of games that made the move
+        :param wins: The number of those games won by the player who made the move
+        """
+        if not self._writable:
+            raise ValueError("The book was opened read-only")
+        for offset, (slot_key, slot_games, slot_wins, slot_code) in self._probe(key):
+            if slot_key == key and slot_code == code:
+                _SLOT.pack_into(self._map, offset, key, slot_games + games, slot_wins + wins, code)
+                return
+            if not slot_key:
+                break
+        if 2 * (self._used + 1) > self._slots:
+            self._grow()
+            self.add(key, code, games, wins)
+            return
+        _SLOT.pack_into(self._map, offset, key, games, wins, code)
+        self._used += 1
+        _HEADER.pack_into(self._map, 0, BOOK_MAGIC, self._slots, self._used)
+
+    def _grow(self):
+        """Helper function for add that rewrites the book with twice as many slots."""
+        entries = []
+        for index in range(self._slots):
+            slot = _SLOT.unpack_from(self._map, _HEADER.size + index * _SLOT.size)
+            if slot[0]:
+                entries.append(slot)
+        slots = self._slots * 2
+        self._map.close()
+        temporary = self._path + ".tmp"
+        create_book(temporary, slots)
+        os.replace(temporary, self._path)
+        self._open()
+        for key, games, wins, code in entries:
+            self.add(key, code, games, wins)
+
+    def merge_games(self, records, max_moves=16):
+        """
+        Adds the first moves of a batch of games to the book.
+        :param records: An iterable of (player1, player2, first_player, move codes) records, for example from
+                        ArchiveReader.record or self_play
+        :param max_moves: The number of moves from the start of each game to add
+        :return: The number of games added
+        """
+        totals = {}
+        count = 0
+        for record in records:
+            for key, code, won in game_entries(*record, max_moves):
+                total = totals.setdefault((key, code), [0, 0])
+                total[0] += 1
+                total[1] += won
+            count += 1
+        for (key, code), (games, wins) in totals.items():
+            self.add(key, code, games, wins)
+        self._map.flush()
+        return count
+
+    def merge_archive(self, path, max_moves=16):
+        """Adds the first moves of every game in a KubaRecord archive file and returns the number of games added."""
+        with ArchiveReader(path) as reader:
+            return self.merge_games((reader.record(index) for index in range(len(reader))), max_moves)
+
+    def close(self):
+        """Unmaps the book file."""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main():
+    """Builds or extends a book from archives or self-play and prints the book moves of the opening position."""
+    parser = argparse.ArgumentParser(description="Build a KubaGame opening book.")
+    parser.add_argument("book")
+    parser.add_argument("archives", nargs="*", help="KubaRecord archive files to merge")
+    parser.add_argument("--games", type=int, default=0, help="self-play games to merge (default: 0)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--moves", type=int, default=16, help="moves per game to add to the book (default: 16)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.book):
+        create_book(args.book)
+    with OpeningBook(args.book, writable=True) as book:
+        for path in args.archives:
+            print("%s: %d games" % (path, book.merge_archive(path, args.moves)))
+        if args.games:
+            count = book.merge_games(self_play(args.games, POLICIES[args.policy], args.seed), args.moves)
+            print("self-play: %d games" % count)
+        print("%d entries" % len(book))
+        game = KubaGame(PLAYER1, PLAYER2)
+        for move, games, win_rate in book.book_moves(game, PLAYER1[0]):
+            print("%-20s %8d %6.3f" % (move, games, win_rate))
+
+
+if __name__ == '__main__':
+    main()
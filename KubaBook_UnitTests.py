@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from KubaBook import OpeningBook, create_book, game_entries, position_key, self_play
+from KubaGame import KubaGame, decode_move
+from KubaRecord import ArchiveWriter
+from KubaTournament import PLAYER1, PLAYER2, random_policy
+
+
+class UnitTests(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".book")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_book_moves(self):
+        """Test that the book counts the games and wins of each opening move and grows as it fills."""
+        records = list(self_play(8, random_policy, seed=5, max_moves=60))
+        create_book(self.path, slots=4)
+        with OpeningBook(self.path, writable=True) as book:
+            self.assertEqual(book.merge_games(records, max_moves=4), 8)
+            entries = {}
+            for record in records:
+                for key, code, won in game_entries(*record, 4):
+                    entries.setdefault((key, code), []).append(won)
+            self.assertEqual(len(book), len(entries))
+            self.assertEqual(game_entries(*records[1], 0), [])
+
+        with OpeningBook(self.path) as book:
+            for (key, code), wins in entries.items():
+                self.assertIn((code, len(wins), sum(wins)), book.lookup(key))
+            game = KubaGame(PLAYER1, PLAYER2)
+            moves = book.book_moves(game, PLAYER1[0])
+            self.assertEqual(sum(games for _, games, _ in moves), 4)
+            self.assertEqual(book.best_move(game, PLAYER1[0]), moves[0][0])
+            self.assertEqual(sum(games for _, games, _ in book.book_moves(game, PLAYER2[0])), 4)
+            self.assertEqual(book.lookup(position_key(game, PLAYER1[0]) ^ 1), [])
+            self.assertRaises(ValueError, book.add, 1, 0, 1, 0)
+
+    def test_merge_archive(self):
+        """Test that merging the same archive twice doubles every count."""
+        archive = self.path + ".kuba"
+        try:
+            with ArchiveWriter(archive) as writer:
+                for player1, player2, first_player, codes in self_play(4, random_policy, seed=6, max_moves=40):
+                    writer.add(player1, player2, first_player, [decode_move(code) for code in codes])
+            create_book(self.path)
+            with OpeningBook(self.path, writable=True) as book:
+                self.assertEqual(book.merge_archive(archive, max_moves=6), 4)
+                game = KubaGame(PLAYER1, PLAYER2)
+                once = book.book_moves(game, PLAYER1[0])
+                entries = len(book)
+                book.merge_archive(archive, max_moves=6)
+                self.assertEqual(len(book), entries)
+                self.assertEqual(book.book_moves(game, PLAYER1[0]),
+                                 [(move, 2 * games, win_rate) for move, games, win_rate in once])
+        finally:
+            os.remove(archive)
+
+    def test_not_a_book(self):
+        """Test that opening a file that is not a book raises ValueError."""
+        with open(self.path, "wb") as file:
+            file.write(bytes(64))
+        self.assertRaises(ValueError, OpeningBook, self.path)
+        self.assertRaises(ValueError, create_book, self.path, 6)
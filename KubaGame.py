@@ -5,42 +5,425 @@
 #              take turns making valid moves until one player has captured 7 neutral red marbles, until one player
 #              has captured all of the other player's marbles, or until one player has eliminated all legal moves for
 #              the other player. When any of these win conditions have been met, that player is the winner.
+#              Class BoardSetup describes other board sizes, layouts, and red marble win thresholds.
+
+import random
+import struct
+import time
+
+BOARD_SIZE = 7
+STARTING_LAYOUT = ("WWXXXBB",
+                   "WWXRXBB",
+                   "XXRRRXX",
+                   "XRRRRRX",
+                   "XXRRRXX",
+                   "BBXRXWW",
+                   "BBXXXWW")
+DIRECTIONS = {"F": (-1, 0), "B": (1, 0), "L": (0, -1), "R": (0, 1)}
+_DIRECTION_NAMES = list(DIRECTIONS)
+_DIRECTION_INDEX = {direction: index for index, direction in enumerate(DIRECTIONS)}
+# The order of the bitboards of a game
+MARBLES = ("W", "B", "R")
+_MARBLE_INDEX = {marble: index for index, marble in enumerate(MARBLES)}
+FEATURE_MARBLES = MARBLES
+_popcount = int.bit_count if hasattr(int, "bit_count") else lambda value: bin(value).count("1")
+
+
+class MoveStats:
+    """
+    Represents counters and timings of make_move calls. Each call is split into phases that are timed separately.
+    Rejected calls are counted by reason, and all calls are counted by direction.
+    """
+    PHASES = ("player", "coordinates", "direction", "push", "ko", "apply", "captured", "no legal moves", "total")
+    REASONS = ("game over", "wrong turn", "bad coordinates", "not own marble", "blocked direction", "self push-off",
+               "ko")
+
+    def __init__(self):
+        """Creates empty counters."""
+        self.reset()
+
+    def reset(self):
+        """Sets every counter and timing back to zero."""
+        self._calls = 0
+        self._accepted = 0
+        self._captures = 0
+        self._rejections = dict.fromkeys(self.REASONS, 0)
+        self._directions = {}
+        self._phase_calls = dict.fromkeys(self.PHASES, 0)
+        self._phase_ns = dict.fromkeys(self.PHASES, 0)
+        # Histogram bucket i counts phases that took less than 2 ** i nanoseconds
+        self._histograms = {phase: [0] * 64 for phase in self.PHASES}
+        self._direction = None
+        self._start = self._last = 0
+
+    def begin(self, direction):
+        """Starts timing a make_move call."""
+        self._calls += 1
+        self._direction = self._directions.setdefault(direction if direction in DIRECTIONS else "other",
+                                                      {"calls": 0, "accepted": 0, "rejected": 0, "captures": 0})
+        self._direction["calls"] += 1
+        self._start = self._last = time.perf_counter_ns()
+
+    def mark(self, phase):
+        """Records the time since the previous mark, or since begin, as one run of the phase."""
+        now = time.perf_counter_ns()
+        self._record(phase, now - self._last)
+        self._last = now
+
+    def reject(self, reason):
+        """Ends timing a make_move call that returned False for the given reason."""
+        self._rejections[reason] += 1
+        self._direction["rejected"] += 1
+        self._record("total", time.perf_counter_ns() - self._start)
+
+    def accept(self, captured_marble):
+        """Ends timing a make_move call that returned True."""
+        self._accepted += 1
+        self._direction["accepted"] += 1
+        if captured_marble:
+            self._captures += 1
+            self._direction["captures"] += 1
+        self._record("total", time.perf_counter_ns() - self._start)
+
+    def _record(self, phase, elapsed):
+        """Adds one timing to a phase."""
+        self._phase_calls[phase] += 1
+        self._phase_ns[phase] += elapsed
+        self._histograms[phase][min(elapsed.bit_length(), 63)] += 1
+
+    def snapshot(self):
+        """
+        Copies the counters.
+        :return: A dictionary of plain numbers, dictionaries, and lists. The histogram of each phase maps the upper
+                 bound of a bucket in nanoseconds to the number of runs that fell in it, leaving out empty buckets.
+        """
+        return {"calls": self._calls,
+                "accepted": self._accepted,
+                "captures": self._captures,
+                "rejections": dict(self._rejections),
+                "directions": {direction: dict(counts) for direction, counts in self._directions.items()},
+                "phases": {phase: {"calls": self._phase_calls[phase],
+                                   "total_ns": self._phase_ns[phase],
+                                   "histogram_ns": {2 ** bucket: count
+                                                    for bucket, count in enumerate(self._histograms[phase]) if count}}
+                           for phase in self.PHASES}}
+
+
+_move_stats = None
+
+
+def enable_move_stats():
+    """Starts recording MoveStats for every make_move call and returns the recorder. Recording is off by default."""
+    global _move_stats
+    if _move_stats is None:
+        _move_stats = MoveStats()
+    return _move_stats
+
+
+def disable_move_stats():
+    """Stops recording MoveStats."""
+    global _move_stats
+    _move_stats = None
+
+
+def get_move_stats():
+    """Returns the MoveStats being recorded, or None if recording is off."""
+    return _move_stats
+
+
+def scaled_layout(size):
+    """
+    Builds a starting layout for an odd board size of at least 5 in the pattern of STARTING_LAYOUT: a square block
+    of each player's marbles in every corner and a diamond of red marbles in the center. scaled_layout(7) is
+    STARTING_LAYOUT.
+    :param size: The number of rows and columns as an integer
+    :return: A tuple of row strings
+    """
+    if size < 5 or size % 2 == 0:
+        raise ValueError("A scaled layout needs an odd board size of at least 5")
+    block, radius, center = (size - 1) // 3, (size - 3) // 2, size // 2
+    layout = []
+    for row in range(size):
+        squares = []
+        for column in range(size):
+            top, left = row < block, column < block
+            bottom, right = row >= size - block, column >= size - block
+            if (top and left) or (bottom and right):
+                squares.append("W")
+            elif (top and right) or (bottom and left):
+                squares.append("B")
+            elif abs(row - center) + abs(column - center) <= radius:
+                squares.append("R")
+            else:
+                squares.append("X")
+        layout.append("".join(squares))
+    return tuple(layout)
+
+
+_zobrist_keys = {}
+
+
+def zobrist_keys(size):
+    """
+    Returns fixed-seed 64-bit Zobrist keys for a board size, so that position hashes agree between processes and runs.
+    The 7x7 keys keep their original seed, so the hashes of standard games do not depend on the other sizes.
+    :param size: The number of rows and columns as an integer
+    :return: A dictionary mapping each marble color ("W", "B", "R") to a list of one key per square
+    """
+    if size not in _zobrist_keys:
+        generator = random.Random(0x4B554241 if size == BOARD_SIZE else "KUBA %d" % size)
+        _zobrist_keys[size] = {marble: [generator.getrandbits(64) for _ in range(size * size)]
+                               for marble in ("W", "B", "R")}
+    return _zobrist_keys[size]
+
+
+def layout_masks(layout):
+    """
+    Converts a square board layout into bitboards. Square (row, column) is stored in bit row * size + column.
+    :param layout: A sequence of row strings using "W", "B", "R" and "X" (ex: STARTING_LAYOUT)
+    :return: A dictionary mapping each marble color ("W", "B", "R") to its bitboard as an integer
+    """
+    masks = {"W": 0, "B": 0, "R": 0}
+    for row, squares in enumerate(layout):
+        for column, marble in enumerate(squares):
+            if marble != "X":
+                masks[marble] |= 1 << (row * len(layout) + column)
+    return masks
+
+
+class BoardSetup:
+    """
+    Represents the board size, starting layout, and win thresholds of a game, with the lookup tables that depend on
+    them. A player wins by capturing reds_to_win red marbles or all of the other player's marbles. Setups with the
+    same layout and threshold are equal.
+    """
+    def __init__(self, layout, reds_to_win=None):
+        """
+        Creates a board setup.
+        :param layout: A sequence of row strings using "W", "B", "R" and "X" for a square board of at least 2 rows
+                       with at least one white and one black marble (ex: STARTING_LAYOUT)
+        :param reds_to_win: The number of red marbles that wins, from 1 to the number of red marbles on the board.
+                            Defaults to a majority of the red marbles.
+        """
+        size = len(layout)
+        if size < 2 or any(len(squares) != size or set(squares) - set("WBRX") for squares in layout):
+            raise ValueError("A layout must be a square of at least 2 rows of W, B, R, and X")
+        self.size = size
+        self.layout = tuple(layout)
+        self.masks = layout_masks(layout)
+        self.marbles = {marble: _popcount(mask) for marble, mask in self.masks.items()}
+        if not self.marbles["W"] or not self.marbles["B"]:
+            raise ValueError("A layout needs white and black marbles")
+        self.reds_to_win = self.marbles["R"] // 2 + 1 if reds_to_win is None else reds_to_win
+        if not 1 <= self.reds_to_win <= self.marbles["R"]:
+            raise ValueError("reds_to_win must be from 1 to the %d red marbles on the board" % self.marbles["R"])
+        self.move_limit = size * size * len(DIRECTIONS)
+        self.zobrist_keys = zobrist_keys(size)
+        # The starting bitboards and Zobrist keys in the order of MARBLES
+        self.bitboards = tuple(self.masks[marble] for marble in MARBLES)
+        self.zobrist_tables = tuple(self.zobrist_keys[marble] for marble in MARBLES)
+
+        # For each direction index and square: the (square, bit) pairs a push travels through from the pushed marble
+        # to the edge, and the bit of the square behind the marble (0 on the edge). For each direction index, color
+        # index, and square: the hash change of moving a marble of that color one step, or off the board on the edge.
+        self.shifts = [row_step * size + column_step for row_step, column_step in DIRECTIONS.values()]
+        self.paths, self.behind, self.move_keys = [], [], []
+        for row_step, column_step in DIRECTIONS.values():
+            paths, behind, move_keys = [], [], [[], [], []]
+            for square in range(size * size):
+                row, column = divmod(square, size)
+                path = []
+                while 0 <= row < size and 0 <= column < size:
+                    path.append((row * size + column, 1 << (row * size + column)))
+                    row, column = row + row_step, column + column_step
+                paths.append(tuple(path))
+                row, column = divmod(square, size)
+                behind_row, behind_column = row - row_step, column - column_step
+                on_board = 0 <= behind_row < size and 0 <= behind_column < size
+                behind.append(1 << (behind_row * size + behind_column) if on_board else 0)
+                next_row, next_column = row + row_step, column + column_step
+                for keys, color_keys in zip(self.zobrist_tables, move_keys):
+                    if 0 <= next_row < size and 0 <= next_column < size:
+                        color_keys.append(keys[square] ^ keys[next_row * size + next_column])
+                    else:
+                        color_keys.append(keys[square])
+            self.paths.append(paths)
+            self.behind.append(behind)
+            self.move_keys.append(move_keys)
+
+        # Evaluation features: for each marble color, the number of marbles in each row and each column, on the
+        # perimeter, and that valid_direction allows to be pushed in at least one direction
+        self.feature_names = tuple("%s %s" % (marble, name) for marble in FEATURE_MARBLES
+                                   for name in ["row %d" % row for row in range(size)] +
+                                   ["column %d" % column for column in range(size)] + ["perimeter", "pushable"])
+        self.feature_block = 2 * size + 2
+        self.full_mask = (1 << size * size) - 1
+        self.first_row_mask = (1 << size) - 1
+        self.last_row_mask = self.first_row_mask << size * (size - 1)
+        self.first_column_mask = sum(1 << row * size for row in range(size))
+        self.last_column_mask = self.first_column_mask << size - 1
+        self.perimeter_mask = self.first_row_mask | self.last_row_mask | self.first_column_mask | self.last_column_mask
+        # For each direction: the bit shift of one step, the edge a marble is pushed toward, and the opposite edge
+        self.direction_masks = [(row_step * size + column_step, front, back) for (row_step, column_step), front, back in
+                                ((DIRECTIONS["F"], self.first_row_mask, self.last_row_mask),
+                                 (DIRECTIONS["B"], self.last_row_mask, self.first_row_mask),
+                                 (DIRECTIONS["L"], self.first_column_mask, self.last_column_mask),
+                                 (DIRECTIONS["R"], self.last_column_mask, self.first_column_mask))]
+        # The row feature, column feature, and perimeter flag of each square, relative to the start of a color
+        self.square_features = [(square // size, size + square % size, self.perimeter_mask >> square & 1)
+                                for square in range(size * size)]
+        # The hash and features of the starting layout, which every new game copies
+        self.hash = board_hash(self.masks, self)
+        self.features = tuple(board_features(self.masks, self))
+
+        # Packed state: the W, B, and R bitboards side by side, the four bank counts, a flags byte, and one ko hash
+        count = "B" if max(self.marbles.values()) < 256 else "H"
+        self.snapshot_format = struct.Struct("<%ds4%sBQ" % ((3 * size * size + 7) // 8, count))
+
+    @classmethod
+    def scaled(cls, size, reds_to_win=None):
+        """Creates the setup of scaled_layout(size)."""
+        return cls(scaled_layout(size), reds_to_win)
+
+    def encode_move(self, coordinates, direction):
+        """Returns the code of a move, (row * size + column) * 4 plus the index of the direction."""
+        row, column = coordinates
+        if not 0 <= row < self.size or not 0 <= column < self.size or direction not in DIRECTIONS:
+            raise ValueError("Cannot encode move %s %s" % (coordinates, direction))
+        return (row * self.size + column) * 4 + _DIRECTION_NAMES.index(direction)
+
+    def decode_move(self, code):
+        """Returns the (coordinates, direction) move of a move code."""
+        if not 0 <= code < self.move_limit:
+            raise ValueError("Invalid move code %d" % code)
+        square, direction = divmod(code, 4)
+        return divmod(square, self.size), _DIRECTION_NAMES[direction]
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        """A setup is never changed, so copies of a game share it."""
+        return self
+
+    def __reduce__(self):
+        return BoardSetup, (self.layout, self.reds_to_win)
+
+    def __eq__(self, other):
+        return isinstance(other, BoardSetup) and (self.layout, self.reds_to_win) == (other.layout, other.reds_to_win)
+
+    def __hash__(self):
+        return hash((self.layout, self.reds_to_win))
+
+    def __repr__(self):
+        return "BoardSetup(%d x %d, reds_to_win=%d)" % (self.size, self.size, self.reds_to_win)
+
+
+def encode_move(coordinates, direction):
+    """Returns the one-byte code of a move on the standard board, (row * 7 + column) * 4 plus the direction index."""
+    return STANDARD_SETUP.encode_move(coordinates, direction)
+
+
+def decode_move(code):
+    """Returns the (coordinates, direction) move of a one-byte move code on the standard board."""
+    return STANDARD_SETUP.decode_move(code)
+
+
+def board_hash(masks, setup=None):
+    """
+    Computes the Zobrist hash of a board from scratch.
+    :param masks: A dictionary mapping each marble color ("W", "B", "R") to its bitboard as an integer
+    :param setup: The BoardSetup of the board. Defaults to STANDARD_SETUP.
+    :return: The 64-bit hash of the board as an integer
+    """
+    zobrist = (setup or STANDARD_SETUP).zobrist_keys
+    value = 0
+    for marble, mask in masks.items():
+        keys = zobrist[marble]
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            value ^= keys[bit.bit_length() - 1]
+    return value
+
+
+def pushable_mask(occupied, setup=None):
+    """
+    Finds the marbles that valid_direction allows to be pushed in at least one direction. A marble on the perimeter
+    can always be pushed away from the edge, and any other marble can be pushed if a neighboring square is empty.
+    :param occupied: The bitboard of all marbles on the board
+    :param setup: The BoardSetup of the board. Defaults to STANDARD_SETUP.
+    :return: The bitboard of the pushable marbles
+    """
+    setup = setup or STANDARD_SETUP
+    size = setup.size
+    empty = ~occupied & setup.full_mask
+    # Shifting by one column wraps between rows, but only onto perimeter squares, which are pushable anyway
+    return occupied & (setup.perimeter_mask | empty << 1 | empty >> 1 | empty << size | empty >> size)
+
+
+def board_features(masks, setup=None):
+    """
+    Computes the evaluation features of a board from scratch.
+    :param masks: A dictionary mapping each marble color ("W", "B", "R") to its bitboard as an integer
+    :param setup: The BoardSetup of the board. Defaults to STANDARD_SETUP.
+    :return: A list of the features in the order of the setup's feature_names
+    """
+    setup = setup or STANDARD_SETUP
+    size = setup.size
+    features = [0] * (len(FEATURE_MARBLES) * setup.feature_block)
+    pushable = pushable_mask(masks["W"] | masks["B"] | masks["R"], setup)
+    for index, marble in enumerate(FEATURE_MARBLES):
+        base = index * setup.feature_block
+        mask = masks[marble]
+        for square in range(size * size):
+            if mask >> square & 1:
+                row, column = divmod(square, size)
+                features[base + row] += 1
+                features[base + size + column] += 1
+        features[base + 2 * size] = _popcount(mask & setup.perimeter_mask)
+        features[base + 2 * size + 1] = _popcount(mask & pushable)
+    return features
+
+
+STANDARD_SETUP = BoardSetup(STARTING_LAYOUT)
+ZOBRIST_KEYS = STANDARD_SETUP.zobrist_keys
+MOVE_LIMIT = STANDARD_SETUP.move_limit
+SNAPSHOT_SIZE = STANDARD_SETUP.snapshot_format.size
+FEATURE_NAMES = STANDARD_SETUP.feature_names
+
 
 class KubaGame:
     """Represents a KubaGame object with game mechanics."""
-    def __init__(self, player1, player2):
+    __slots__ = ("_player1", "_player1_bank", "_player2", "_player2_bank", "_current_player", "_bitboards", "_hash",
+                 "_p1_prev_hash", "_p2_prev_hash", "_winner", "_history", "_features", "_feature_masks",
+                 "_setup")
+
+    def __init__(self, player1, player2, setup=None):
         """
         Creates a KubaGame with players, a board, and a marble count.
         :param player1: A tuple containing the player name and the player's marble color (ex: ('PlayerA','W'))
         :param player2: A tuple containing the player name and the player's marble color (ex: ('PlayerB','B'))
+        :param setup: The BoardSetup of the board. Defaults to STANDARD_SETUP, the 7x7 board described above.
         """
+        self._setup = setup = setup or STANDARD_SETUP
         self._player1 = player1
         self._player1_bank = [0, 0]
         self._player2 = player2
         self._player2_bank = [0, 0]
         self._current_player = None
-        self._board = [["W", "W", "X", "X", "X", "B", "B"],
-                       ["W", "W", "X", "R", "X", "B", "B"],
-                       ["X", "X", "R", "R", "R", "X", "X"],
-                       ["X", "R", "R", "R", "R", "R", "X"],
-                       ["X", "X", "R", "R", "R", "X", "X"],
-                       ["B", "B", "X", "R", "X", "W", "W"],
-                       ["B", "B", "X", "X", "X", "W", "W"]]
-        self._p1_prev_board = [["W", "W", "X", "X", "X", "B", "B"],
-                               ["W", "W", "X", "R", "X", "B", "B"],
-                               ["X", "X", "R", "R", "R", "X", "X"],
-                               ["X", "R", "R", "R", "R", "R", "X"],
-                               ["X", "X", "R", "R", "R", "X", "X"],
-                               ["B", "B", "X", "R", "X", "W", "W"],
-                               ["B", "B", "X", "X", "X", "W", "W"]]
-        self._p2_prev_board = [["W", "W", "X", "X", "X", "B", "B"],
-                               ["W", "W", "X", "R", "X", "B", "B"],
-                               ["X", "X", "R", "R", "R", "X", "X"],
-                               ["X", "R", "R", "R", "R", "R", "X"],
-                               ["X", "X", "R", "R", "R", "X", "X"],
-                               ["B", "B", "X", "R", "X", "W", "W"],
-                               ["B", "B", "X", "X", "X", "W", "W"]]
+        self._bitboards = setup.bitboards
+        self._hash = setup.hash
+        self._p1_prev_hash = self._hash
+        self._p2_prev_hash = self._hash
         self._winner = None
+        self._history = []
+        self._features = list(setup.features)
+        self._feature_masks = setup.bitboards
+
+    def get_setup(self):
+        """Returns the BoardSetup of the game."""
+        return self._setup
 
     def get_current_turn(self):
         """Returns the player name whose turn it is. Otherwise, returns None if no player has made the first move."""
@@ -55,7 +438,16 @@ class KubaGame:
                           "L" (Left), "R" (Right), "F" (Forward), and "B" (Backward)
         :return: True if the the move is valid. Otherwise, returns False if the move is invalid
         """
+        stats = _move_stats
+        if stats is not None:
+            stats.begin(direction)
+        if self._winner is not None:
+            if stats is not None:
+                stats.reject("game over")
+            return False
+
         # Validate player
+        prev_current_player = self._current_player
         player1 = player_name == self._player1[0]
         player2 = player_name == self._player2[0]
         if player1 and self._current_player is None:
@@ -63,6 +455,8 @@ class KubaGame:
         elif player2 and self._current_player is None:
             self._current_player = player_name
         elif player_name != self._current_player:
+            if stats is not None:
+                stats.reject("wrong turn")
             return False
 
         if player1:
@@ -71,210 +465,424 @@ class KubaGame:
             player_marble = self._player2[1]
         else:
             player_marble = None
+        if stats is not None:
+            stats.mark("player")
 
         # Validate coordinates
         row, column = coordinates[0], coordinates[1]
-        if not 0 <= row <= 6 or not 0 <= column <= 6:
+        setup = self._setup
+        size = setup.size
+        if not 0 <= row < size or not 0 <= column < size:
+            if stats is not None:
+                stats.reject("bad coordinates")
             return False
-        elif self._board[row][column] != player_marble:
+        square = row * size + column
+        white, black, red = bitboards = self._bitboards
+        color = _MARBLE_INDEX.get(player_marble)
+        if color is None or not bitboards[color] >> square & 1:
+            if stats is not None:
+                stats.reject("not own marble")
             return False
+        if stats is not None:
+            stats.mark("coordinates")
 
-        # Validate direction
-        value = self.valid_direction(row, column, direction)
+        # Validate direction: a lone marble on the edge it is pushed towards would push itself off, and the square
+        # being pushed away from must be the edge or empty
+        direction_index = _DIRECTION_INDEX.get(direction)
+        if direction_index is not None:
+            path = setup.paths[direction_index][square]
+            value = len(path) > 1 and not (white | black | red) & setup.behind[direction_index][square]
+        else:
+            value = False
+        if stats is not None:
+            stats.mark("direction")
         if not value:
+            if stats is not None:
+                stats.reject("blocked direction")
             return False
 
-        # Make move
-        move = []
-        end_index, captured_marble = None, None
-
-        # Make forward move
-        if direction == "F":
-            board_column = [rows[column] for rows in self._board]
-            for square in range(row, -1, -1):
-                if board_column[square] == "X":
-                    end_index = square
-                    break
-            if end_index is not None:
-                for square in range(len(board_column) - 1, -1, -1):
-                    if square == row:
-                        move = ["X"] + move
-                        move = [board_column[square]] + move
-                    elif square == end_index:
-                        continue
-                    else:
-                        move = [board_column[square]] + move
-            else:
-                captured_marble = board_column[0]
-                if captured_marble == player_marble:
-                    return False
-                for square in range(len(board_column) - 1, 0, -1):
-                    if square == row:
-                        move = ["X"] + move
-                        move = [board_column[square]] + move
-                    else:
-                        move = [board_column[square]] + move
-            # Replace column with move
-            index = 0
-            for row in self._board:
-                row[column] = move[index]
-                index += 1
-
-        # Make backward move
-        if direction == "B":
-            board_column = [rows[column] for rows in self._board]
-            for square in range(row, len(board_column)):
-                if board_column[square] == "X":
-                    end_index = square
-                    break
-            if end_index is not None:
-                for square in range(0, len(board_column)):
-                    if square == row:
-                        move.append("X")
-                        move.append(board_column[square])
-                    elif square == end_index:
-                        continue
-                    else:
-                        move.append(board_column[square])
-            else:
-                captured_marble = board_column[len(board_column) - 1]
-                if captured_marble == player_marble:
-                    return False
-                for square in range(0, len(board_column) - 1):
-                    if square == row:
-                        move.append("X")
-                        move.append(board_column[square])
-                    else:
-                        move.append(board_column[square])
-            # Replace column with move
-            index = 0
-            for row in self._board:
-                row[column] = move[index]
-                index += 1
-
-        # Make left move
-        if direction == "L":
-            board_row = self._board[row]
-            for square in range(column, -1, -1):
-                if board_row[square] == "X":
-                    end_index = square
-                    break
-            if end_index is not None:
-                for square in range(len(board_row) - 1, -1, -1):
-                    if square == column:
-                        move = ["X"] + move
-                        move = [board_row[square]] + move
-                    elif square == end_index:
-                        continue
-                    else:
-                        move = [board_row[square]] + move
-            else:
-                captured_marble = board_row[0]
-                if captured_marble == player_marble:
-                    return False
-                for square in range(len(board_row) - 1, 0, -1):
-                    if square == column:
-                        move = ["X"] + move
-                        move = [board_row[square]] + move
-                    else:
-                        move = [board_row[square]] + move
-            self._board[row] = move
-
-        # Make right move
-        if direction == "R":
-            board_row = self._board[row]
-            for square in range(column, len(board_row)):
-                if board_row[square] == "X":
-                    end_index = square
-                    break
-            if end_index is not None:
-                for square in range(0, len(board_row)):
-                    if square == column:
-                        move.append("X")
-                        move.append(board_row[square])
-                    elif square == end_index:
-                        continue
-                    else:
-                        move.append(board_row[square])
+        # Make move: collect the run of marbles from the pushed marble up to the first empty square or the edge,
+        # updating the hash for each marble that moves or is pushed off
+        move_keys = setup.move_keys[direction_index]
+        new_hash, run, edge, captured = self._hash, 0, 0, None
+        for current, bit in path:
+            if white & bit:
+                marble = 0
+            elif black & bit:
+                marble = 1
+            elif red & bit:
+                marble = 2
             else:
-                captured_marble = board_row[len(board_row) - 1]
-                if captured_marble == player_marble:
-                    return False
-                for square in range(0, len(board_row) - 1):
-                    if square == column:
-                        move.append("X")
-                        move.append(board_row[square])
-                    else:
-                        move.append(board_row[square])
-            self._board[row] = move
+                break
+            new_hash ^= move_keys[marble][current]
+            run |= bit
+        else:
+            edge, captured = bit, marble
+        if stats is not None:
+            stats.mark("push")
+        if captured == color:
+            if stats is not None:
+                stats.reject("self push-off")
+            return False
 
         # Check to see if move is valid; check ko rule
         if player1:
-            if self._p1_prev_board == self._board:
-                self._board = []
-                for row in self._p2_prev_board:
-                    self._board.append(list(row))
-                return False
-            else:
-                self._p1_prev_board = []
-                for row in self._board:
-                    self._p1_prev_board.append(list(row))
+            prev_ko_hash = self._p1_prev_hash
         else:
-            if self._p2_prev_board == self._board:
-                self._board = []
-                for row in self._p1_prev_board:
-                    self._board.append(list(row))
-                return False
-            else:
-                self._p2_prev_board = []
-                for row in self._board:
-                    self._p2_prev_board.append(list(row))
+            prev_ko_hash = self._p2_prev_hash
+        if prev_ko_hash == new_hash:
+            if stats is not None:
+                stats.mark("ko")
+                stats.reject("ko")
+            return False
+        if player1:
+            self._p1_prev_hash = new_hash
+        else:
+            self._p2_prev_hash = new_hash
+        if stats is not None:
+            stats.mark("ko")
+        captured_marble = None if captured is None else MARBLES[captured]
+        self._history.append((player1, bitboards, self._hash, prev_ko_hash, prev_current_player, self._winner,
+                              captured_marble))
+        moving = run ^ edge
+        shift = setup.shifts[direction_index]
+        if shift > 0:
+            self._bitboards = (white & ~run | (white & moving) << shift, black & ~run | (black & moving) << shift,
+                               red & ~run | (red & moving) << shift)
+        else:
+            self._bitboards = (white & ~run | (white & moving) >> -shift, black & ~run | (black & moving) >> -shift,
+                               red & ~run | (red & moving) >> -shift)
+        self._hash = new_hash
+        if stats is not None:
+            stats.mark("apply")
 
         # If a marble was captured, record marble, and evaluate win
         winner = None
         if captured_marble:
             winner = self.captured(captured_marble, player1, player2)
+            if stats is not None:
+                stats.mark("captured")
+
+        # A player left without a legal move loses
+        opponent = self._player2 if player1 else self._player1
+        if winner is None and not self._has_legal_move(opponent[0]):
+            winner = player_name
+        if stats is not None:
+            stats.mark("no legal moves")
 
         if winner is not None:
             self._winner = winner
-        elif player1:
-            self._current_player = self._player2[0]
         else:
-            self._current_player = self._player1[0]
+            self._current_player = opponent[0]
 
+        if stats is not None:
+            stats.accept(captured_marble)
         return True
 
+    def unmake_move(self):
+        """
+        Takes back the most recent successful move, restoring the board, ko state, captures, turn, and winner.
+        :return: True if a move was taken back. Otherwise, returns False if no moves have been made
+        """
+        if not self._history:
+            return False
+        (player1, prev_bitboards, prev_hash, prev_ko_hash, prev_current_player, prev_winner,
+         captured_marble) = self._history.pop()
+
+        self._bitboards = prev_bitboards
+        self._hash = prev_hash
+        if player1:
+            self._p1_prev_hash = prev_ko_hash
+        else:
+            self._p2_prev_hash = prev_ko_hash
+        if captured_marble:
+            bank = self._player1_bank if player1 else self._player2_bank
+            bank[0 if captured_marble == "R" else 1] -= 1
+        self._current_player = prev_current_player
+        self._winner = prev_winner
+        return True
+
+    def apply_moves(self, moves, trusted=True, first_player=None):
+        """
+        Makes a sequence of moves, such as a stored game log, in one loop.
+        :param moves: A sequence of move codes (see encode_move, or BoardSetup.encode_move on other boards), for
+                      example a bytes object. The players are assumed to alternate, starting with the player whose
+                      turn it is.
+        :param trusted: If True, the moves are assumed to be legal and are not validated. Only the ko state after the
+                        last move of each player is kept, and a win is only checked after a capture and after the
+                        last move. If False, every move goes through make_move.
+        :param first_player: The name of the player who moves first if no move has been made yet
+        :return: None if every move was made. Otherwise, returns the index of the first move that was not made: the
+                 first move make_move rejected or with an invalid code, the first move after a win, or 0 if the game
+                 is already over. The moves before it have been made. Moves made here and before can no longer be taken back with unmake_move.
+                 Raises ValueError if no move has been made yet and first_player is not one of the players.
+        """
+        if self._winner is not None:
+            return 0 if len(moves) else None
+        player_name = self._current_player or first_player
+        if player_name not in (self._player1[0], self._player2[0]):
+            raise ValueError("The first player must be one of the players, not %r" % (player_name,))
+        size = self._setup.size
+        if not trusted:
+            for index, code in enumerate(moves):
+                if not 0 <= code < self._setup.move_limit:
+                    self._history = []
+                    return index
+                coordinates, direction = self._setup.decode_move(code)
+                if not self.make_move(player_name, coordinates, direction):
+                    self._history = []
+                    return index
+                player_name = self._current_player
+            self._history = []
+            return None
+
+        self._history = []
+        player1 = player_name == self._player1[0]
+        p1_prev_hash, p2_prev_hash = self._p1_prev_hash, self._p2_prev_hash
+        winner = unmade = None
+        for index, code in enumerate(moves):
+            square, direction = divmod(code, 4)
+            row, column = divmod(square, size)
+            direction = _DIRECTION_NAMES[direction]
+            run, edge, captured_marble, new_hash = self._push(row, column, direction)
+            self._shift_run(run, edge, direction)
+            self._hash = new_hash
+            if player1:
+                p1_prev_hash = new_hash
+            else:
+                p2_prev_hash = new_hash
+            if captured_marble:
+                winner = self.captured(captured_marble, player1, not player1)
+                if winner is not None:
+                    if index + 1 < len(moves):
+                        unmade = index + 1
+                    break
+            player1 = not player1
+        self._p1_prev_hash, self._p2_prev_hash = p1_prev_hash, p2_prev_hash
+
+        # A player left without a legal move after the last move loses
+        if winner is None and len(moves):
+            mover, opponent = (self._player2, self._player1) if player1 else (self._player1, self._player2)
+            if not self._has_legal_move(opponent[0]):
+                winner = mover[0]
+        if winner is not None:
+            self._winner, self._current_player = winner, winner
+        elif len(moves):
+            self._current_player = self._player1[0] if player1 else self._player2[0]
+        return unmade
+
+    def forget_history(self):
+        """Discards the undo records of the moves made so far, so they can no longer be taken back with unmake_move."""
+        self._history = []
+
+    def to_bytes(self):
+        """
+        Packs the board, captured marbles, turn, winner, and ko state into SNAPSHOT_SIZE (32) bytes on the standard
+        board, or the setup's snapshot_format.size bytes on other boards. The players, the setup, and the undo history
+        are not included. A player whose ko hash is the current position hash, such as the player who made the last
+        move, costs nothing, so only the other player's ko hash is stored.
+        :return: The packed state as bytes, which are immutable and hashable
+        """
+        players = (None, self._player1[0], self._player2[0])
+        flags = players.index(self._current_player) | players.index(self._winner) << 2
+        ko_hash = 0
+        for bit, prev_hash in ((16, self._p1_prev_hash), (32, self._p2_prev_hash)):
+            if prev_hash != self._hash:
+                if flags & 48:
+                    raise ValueError("Only one ko hash can differ from the position hash")
+                flags |= bit
+                ko_hash = prev_hash
+        area = self._setup.size * self._setup.size
+        white, black, red = self._bitboards
+        board = white | black << area | red << 2 * area
+        snapshot_format = self._setup.snapshot_format
+        return snapshot_format.pack(board.to_bytes((3 * area + 7) // 8, "little"), *self._player1_bank,
+                                    *self._player2_bank, flags, ko_hash)
+
+    @classmethod
+    def from_bytes(cls, player1, player2, data, setup=None):
+        """
+        Creates a KubaGame from a state packed by to_bytes.
+        :param player1: A tuple containing the player name and the player's marble color (ex: ('PlayerA','W'))
+        :param player2: A tuple containing the player name and the player's marble color (ex: ('PlayerB','B'))
+        :param data: The packed state as a bytes-like object
+        :param setup: The BoardSetup of the packed game. Defaults to STANDARD_SETUP.
+        :return: A KubaGame object without undo history
+        """
+        game = cls(player1, player2, setup)
+        game.restore(data)
+        return game
+
+    def snapshot(self):
+        """Returns the state of the game for restore. It is the same bytes as to_bytes."""
+        return self.to_bytes()
+
+    def restore(self, snapshot):
+        """
+        Sets the game to a state packed by snapshot or to_bytes and discards the undo history.
+        :param snapshot: The packed state as a bytes-like object
+        """
+        snapshot_format = self._setup.snapshot_format
+        if len(snapshot) != snapshot_format.size:
+            raise ValueError("A snapshot is %d bytes, not %d" % (snapshot_format.size, len(snapshot)))
+        board, p1_reds, p1_marbles, p2_reds, p2_marbles, flags, ko_hash = snapshot_format.unpack(snapshot)
+        board = int.from_bytes(board, "little")
+        area = self._setup.size * self._setup.size
+        full = self._setup.full_mask
+        self._set_masks({"W": board & full, "B": board >> area & full, "R": board >> 2 * area})
+        self._player1_bank = [p1_reds, p1_marbles]
+        self._player2_bank = [p2_reds, p2_marbles]
+        players = (None, self._player1[0], self._player2[0])
+        self._current_player = players[flags & 3]
+        self._winner = players[flags >> 2 & 3]
+        self._p1_prev_hash = ko_hash if flags & 16 else self._hash
+        self._p2_prev_hash = ko_hash if flags & 32 else self._hash
+        self._history = []
+
+    def get_masks(self):
+        """Returns the bitboards of the board as a dictionary mapping each marble color to its bitboard."""
+        return dict(zip(MARBLES, self._bitboards))
+
+    def _set_masks(self, masks):
+        """
+        Helper function for restore that replaces the board and computes its hash from scratch.
+        :param masks: A dictionary mapping each marble color ("W", "B", "R") to its bitboard as an integer
+        """
+        self._bitboards = tuple(masks[marble] for marble in MARBLES)
+        self._hash = board_hash(masks, self._setup)
+
+    def legal_moves(self, player_name):
+        """
+        Finds every move the given player could make on the current board without changing the board.
+        :param player_name: The player's name as a string
+        :return: A list of (coordinates, direction) tuples that pass direction validation, the ko rule, and do not
+                 push the player's own marble off the board. Returns an empty list if the player name is unknown.
+        """
+        return list(self._generate_moves(player_name))
+
+    def _generate_moves(self, player_name):
+        """Helper function for legal_moves and _has_legal_move that yields the player's legal moves one at a time."""
+        if player_name == self._player1[0]:
+            player_marble, prev_hash = self._player1[1], self._p1_prev_hash
+        elif player_name == self._player2[0]:
+            player_marble, prev_hash = self._player2[1], self._p2_prev_hash
+        else:
+            return
+
+        color = _MARBLE_INDEX.get(player_marble)
+        remaining = 0 if color is None else self._bitboards[color]
+        size = self._setup.size
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            row, column = divmod(bit.bit_length() - 1, size)
+            for direction in DIRECTIONS:
+                if not self.valid_direction(row, column, direction):
+                    continue
+                run, edge, captured_marble, new_hash = self._push(row, column, direction)
+                if captured_marble == player_marble or new_hash == prev_hash:
+                    continue
+                yield (row, column), direction
+
+    def _has_legal_move(self, player_name):
+        """
+        Helper function for make_move and apply_moves that checks whether a player has a legal move. Pushes whose run
+        of marbles ends at an empty square are counted with bitboard fills. Such a push never pushes a marble off the
+        board, and two different ones cannot both recreate the board the ko rule forbids, so finding two is enough.
+        Only when there are fewer are the legal moves generated one at a time.
+        """
+        player_marble = self._player1[1] if player_name == self._player1[0] else self._player2[1]
+        white, black, red = self._bitboards
+        color = _MARBLE_INDEX.get(player_marble)
+        mine = 0 if color is None else self._bitboards[color]
+        setup = self._setup
+        occupied = white | black | red
+        empty = ~occupied & setup.full_mask
+        pushes = 0
+        for shift, front, back in setup.direction_masks:
+            # Squares from which the run in this direction reaches an empty square, doubling the distance each round.
+            # The square behind the pushed marble must be empty or off the board.
+            reach, through = empty, occupied & ~front
+            if shift > 0:
+                behind, distance = empty << shift | back, shift
+                while through:
+                    reach |= through & reach >> distance
+                    through &= through >> distance
+                    distance += distance
+            else:
+                behind, distance = empty >> -shift | back, -shift
+                while through:
+                    reach |= through & reach << distance
+                    through &= through << distance
+                    distance += distance
+            pushes += _popcount(mine & reach & behind)
+            if pushes >= 2:
+                return True
+        return next(self._generate_moves(player_name), None) is not None
+
     def valid_direction(self, row, column, direction):
         """
-        Helper function for make_move to validate the direction of the player's move.
+        Helper function for legal_moves to validate the direction of the player's move.
         :param row: The row number as an integer of the marble to be moved
         :param column: The column number as an integer of the marble to be moved
         :param direction: A valid direction as a char to move the marble
         :return: True if the direction is valid. Else, False if the direction is invalid.
         """
-        forward1, back1, right1, left1 = row - 1, row + 1, column + 1, column - 1
-
-        # Validate forward
-        if direction == "F" and back1 != 7:
-            if row == 0 or self._board[back1][column] != "X":
-                return False
+        index = _DIRECTION_INDEX.get(direction)
+        if index is None:
+            return False
+        setup = self._setup
+        square = row * setup.size + column
+        white, black, red = self._bitboards
 
-        # Validate backward
-        if direction == "B" and forward1 != -1:
-            if row == 6 or self._board[forward1][column] != "X":
-                return False
+        # A lone marble on the edge it is pushed towards would push itself off, and the square being pushed away from
+        # must be the edge or empty
+        return len(setup.paths[index][square]) > 1 and not (white | black | red) & setup.behind[index][square]
 
-        # Validate right
-        if direction == "R" and left1 != -1:
-            if column == 6 or self._board[row][left1] != "X":
-                return False
+    def _push(self, row, column, direction):
+        """
+        Helper function for make_move and legal_moves to push a marble without changing the board.
+        :param row: The row number as an integer of the marble to be moved
+        :param column: The column number as an integer of the marble to be moved
+        :param direction: A valid direction as a char to move the marble
+        :return: A tuple of the bitboard of the pushed run of marbles, the bit of the marble pushed off the board or 0,
+                 the color of the marble pushed off the board or None, and the resulting position hash
+        """
+        # Collect the run of marbles from the pushed marble up to the first empty square or the edge, updating the
+        # hash for each marble that moves or is pushed off. The loop only visits the marbles that move, so the cost
+        # of a push grows with the length of the run rather than with the board size.
+        white, black, red = self._bitboards
+        setup = self._setup
+        index = _DIRECTION_INDEX[direction]
+        move_keys = setup.move_keys[index]
+        new_hash, run, edge, captured_marble = self._hash, 0, 0, None
+        for current, bit in setup.paths[index][row * setup.size + column]:
+            if white & bit:
+                marble = 0
+            elif black & bit:
+                marble = 1
+            elif red & bit:
+                marble = 2
+            else:
+                break
+            new_hash ^= move_keys[marble][current]
+            run |= bit
+        else:
+            edge, captured_marble = bit, MARBLES[marble]
 
-        # Validate left
-        if direction == "L" and right1 != 7:
-            if column == 0 or self._board[row][right1] != "X":
-                return False
+        return run, edge, captured_marble, new_hash
 
-        return True
+    def _shift_run(self, run, edge, direction):
+        """
+        Helper function for apply_moves that shifts a run of marbles one square, dropping the marble on the edge bit.
+        make_move does the same inline.
+        """
+        shift = self._setup.shifts[_DIRECTION_INDEX[direction]]
+        moving = run ^ edge
+        if shift > 0:
+            self._bitboards = tuple(mask & ~run | (mask & moving) << shift for mask in self._bitboards)
+        else:
+            self._bitboards = tuple(mask & ~run | (mask & moving) >> -shift for mask in self._bitboards)
 
     def captured(self, captured_marble, player1, player2):
         """
@@ -293,9 +901,10 @@ class KubaGame:
         else:
             self._player2_bank[1] += 1
 
-        if self._player1_bank[0] == 7 or self._player1_bank[1] == 8:
+        reds_to_win, marbles = self._setup.reds_to_win, self._setup.marbles
+        if self._player1_bank[0] == reds_to_win or self._player1_bank[1] == marbles[self._player2[1]]:
             return self._player1[0]
-        elif self._player2_bank[0] == 7 or self._player2_bank[1] == 8:
+        elif self._player2_bank[0] == reds_to_win or self._player2_bank[1] == marbles[self._player1[1]]:
             return self._player2[0]
         else:
             return
@@ -314,8 +923,75 @@ class KubaGame:
             return
 
     def get_marble(self, coordinates):
-        """Returns the marble that is present at the coordinate location."""
-        return self._board[coordinates[0]][coordinates[1]]
+        """Returns the marble that is present at the coordinate location. Raises IndexError if it is off the board."""
+        row, column = coordinates
+        size = self._setup.size
+        if not (0 <= row < size and 0 <= column < size):
+            raise IndexError("Square %s is off the board" % (coordinates,))
+        return self._marble_at(1 << (row * size + column))
+
+    def _marble_at(self, bit):
+        """Returns the color of the marble on the square with the given bitboard bit, or "X" if it is empty."""
+        for marble, mask in zip(MARBLES, self._bitboards):
+            if mask & bit:
+                return marble
+        return "X"
+
+    def get_features(self):
+        """
+        Returns the evaluation features of the board as a tuple in the order of FEATURE_NAMES, or of the setup's
+        feature_names on other boards. Moves do not touch the features; instead they are brought up to date here from
+        the squares that changed since the last call, so reading them after a move or take-back costs one line rather
+        than a scan of the board.
+        """
+        self._sync_features()
+        return tuple(self._features)
+
+    def get_feature_vector(self):
+        """Returns the evaluation features as a NumPy int16 array for batch evaluation. Requires NumPy."""
+        import numpy as np
+        self._sync_features()
+        return np.array(self._features, dtype=np.int16)
+
+    def _sync_features(self):
+        """Helper function for get_features that applies the board changes since the last read."""
+        after = self._bitboards
+        if after != self._feature_masks:
+            self._update_features(self._feature_masks, after)
+            self._feature_masks = after
+
+    def _update_features(self, before, after):
+        """
+        Helper function for _sync_features that updates the evaluation features from one board to another. Only the
+        squares that changed are counted again, which after one move is part of the pushed line, and pushable marbles
+        are only counted again on those squares and their neighbors.
+        :param before: The (W, B, R) bitboards the features were computed for
+        :param after: The current (W, B, R) bitboards
+        """
+        features, setup = self._features, self._setup
+        size, square_features = setup.size, setup.square_features
+        changed = (before[0] ^ after[0]) | (before[1] ^ after[1]) | (before[2] ^ after[2])
+        region = (changed | changed << 1 | changed >> 1 | changed << size | changed >> size) & setup.full_mask
+        pushable_before = pushable_mask(before[0] | before[1] | before[2], setup) & region
+        pushable_after = pushable_mask(after[0] | after[1] | after[2], setup) & region
+        base = 0
+        for old, new in zip(before, after):
+            if old != new:
+                for bits, step in ((old & ~new, -1), (new & ~old, 1)):
+                    while bits:
+                        bit = bits & -bits
+                        bits ^= bit
+                        row, column, perimeter = square_features[bit.bit_length() - 1]
+                        features[base + row] += step
+                        features[base + column] += step
+                        if perimeter:
+                            features[base + 2 * size] += step
+            features[base + 2 * size + 1] += _popcount(new & pushable_after) - _popcount(old & pushable_before)
+            base += setup.feature_block
+
+    def position_hash(self):
+        """Returns the 64-bit Zobrist hash of the marbles on the board. Equal boards always have equal hashes."""
+        return self._hash
 
     def get_marble_count(self):
         """Returns the number of white, black, and red marbles as a tuple in the order (W,B,R)."""
@@ -327,8 +1003,9 @@ class KubaGame:
             black_captured = self._player2_bank[1]
         red_captured = self._player1_bank[0] + self._player2_bank[0]
 
-        total_white = 8 - white_captured
-        total_black = 8 - black_captured
-        total_red = 13 - red_captured
+        marbles = self._setup.marbles
+        total_white = marbles["W"] - white_captured
+        total_black = marbles["B"] - black_captured
+        total_red = marbles["R"] - red_captured
 
         return total_white, total_black, total_red
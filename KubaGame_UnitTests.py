@@ -1,5 +1,11 @@
+import copy
+import pickle
+import random
 import unittest
-from KubaGame import KubaGame
+from KubaBenchmark import KO_MOVES, WINNING_GAME
+from KubaGame import (FEATURE_NAMES, SNAPSHOT_SIZE, STANDARD_SETUP, STARTING_LAYOUT, BoardSetup, KubaGame,
+                      board_features, board_hash, disable_move_stats, enable_move_stats, encode_move, get_move_stats,
+                      layout_masks, scaled_layout)
 
 
 class UnitTests(unittest.TestCase):
@@ -74,6 +80,8 @@ class UnitTests(unittest.TestCase):
         self.assertFalse(game.make_move("PlayerA", (0, -1), "F"))   # Test column input out of range
         self.assertFalse(game.make_move("PlayerA", (-1, 7), "F"))   # Test both row and column input out of range
         self.assertFalse(game.make_move("PlayerA", (7, -1), "F"))   # Test both row and column input out of range
+        self.assertRaises(IndexError, game.get_marble, (7, 0))
+        self.assertRaises(IndexError, game.get_marble, (0, -1))
         self.assertTrue(game.make_move("PlayerA", (6, 0), "F"))
         self.assertEqual(game.get_current_turn(), "PlayerB")
         self.assertTrue(game.make_move("PlayerB", (1, 0), "R"))
@@ -105,3 +113,638 @@ class UnitTests(unittest.TestCase):
         self.assertTrue(game.make_move("PlayerB", (2, 6), "B"))
         self.assertTrue(game.make_move("PlayerA", (4, 4), "L"))
         # print(game.get_board())
+
+    def test_legal_moves(self):
+        """Test the legal move generator from the opening position and against the ko rule."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        self.assertEqual(len(game.legal_moves("PlayerA")), 8)
+        self.assertIn(((6, 5), "F"), game.legal_moves("PlayerA"))
+        self.assertNotIn(((6, 5), "L"), game.legal_moves("PlayerA"))
+        self.assertEqual(game.legal_moves("PlayerC"), [])
+        before = [game.get_marble((row, column)) for row in range(7) for column in range(7)]
+        game.legal_moves("PlayerB")
+        self.assertEqual([game.get_marble((row, column)) for row in range(7) for column in range(7)], before)
+
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        for move in KO_MOVES:
+            self.assertTrue(game.make_move(*move))
+        self.assertNotIn(((1, 1), "R"), game.legal_moves("PlayerA"))   # Ko rule
+        self.assertNotIn(((6, 5), "R"), game.legal_moves("PlayerA"))   # Push own marble off board
+
+    def test_position_hash(self):
+        """Test that the position hash depends only on the marbles on the board."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        opening = game.position_hash()
+        self.assertEqual(opening, KubaGame(("PlayerC", "B"), ("PlayerD", "W")).position_hash())
+        self.assertTrue(game.make_move("PlayerA", (6, 6), "F"))
+        self.assertNotEqual(game.position_hash(), opening)
+        self.assertEqual(game.position_hash(), board_hash(game.get_masks()))
+
+    def test_unmake_move(self):
+        """Test that unmake_move takes back moves, captures, and a win in reverse order."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        self.assertFalse(game.unmake_move())
+        states = []
+        for move in WINNING_GAME:
+            states.append(self.game_state(game))
+            self.assertTrue(game.make_move(*move))
+        self.assertEqual(game.get_winner(), "PlayerA")
+        for move in reversed(WINNING_GAME):
+            self.assertTrue(game.unmake_move())
+            self.assertEqual(self.game_state(game), states.pop())
+        self.assertFalse(game.unmake_move())
+        self.assertEqual(game.get_current_turn(), None)
+        self.assertTrue(game.make_move("PlayerB", (0, 6), "B"))
+
+    def test_apply_moves(self):
+        """Test that apply_moves reaches the same position as make_move, with and without validation."""
+        codes = bytes(encode_move(coordinates, direction) for _, coordinates, direction in WINNING_GAME)
+        reference = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        for count in range(len(codes) + 1):
+            for trusted in (True, False):
+                game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+                self.assertIsNone(game.apply_moves(codes[:count], trusted, "PlayerA"))
+                self.assertEqual(self.game_state(game), self.game_state(reference))
+                self.assertFalse(game.unmake_move())
+            if count < len(codes):
+                reference.make_move(*WINNING_GAME[count])
+        self.assertEqual(reference.get_winner(), "PlayerA")
+
+        # Untrusted moves stop at the first illegal one, here a PlayerB move of a white marble
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        self.assertEqual(game.apply_moves(codes[:5] + bytes([encode_move((0, 0), "F")]), False, "PlayerA"), 5)
+        self.assertEqual(game.apply_moves(codes[5:], False), None)
+        self.assertEqual(self.game_state(game), self.game_state(reference))
+
+        # Moves after the winning capture are not made, trusted or not
+        for trusted in (True, False):
+            game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+            self.assertEqual(game.apply_moves(codes + codes[:2], trusted, "PlayerA"), len(codes))
+            self.assertEqual(self.game_state(game), self.game_state(reference))
+
+        # Invalid codes, a finished game, and an unknown first player
+        self.assertEqual(game.apply_moves(codes[:1]), 0)
+        self.assertEqual(self.game_state(game), self.game_state(reference))
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        self.assertEqual(game.apply_moves(codes[:3] + bytes([250]), False, "PlayerA"), 3)
+        self.assertRaises(ValueError, KubaGame(("PlayerA", "W"), ("PlayerB", "B")).apply_moves, codes[:1])
+        self.assertRaises(ValueError, KubaGame(("PlayerA", "W"), ("PlayerB", "B")).apply_moves, codes[:1], False)
+
+        # The last move of a trusted log can win by leaving the opponent without legal moves
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        game._set_masks(layout_masks(("WXXXXXX",
+                                      "XXXXXXX",
+                                      "XXXRXXX",
+                                      "XXRBRXX",
+                                      "XXXRXXX",
+                                      "XXXXXXX",
+                                      "XXXXXXX")))
+        game.apply_moves([encode_move((0, 0), "R")], first_player="PlayerA")
+        self.assertEqual(game.get_winner(), "PlayerA")
+
+    def test_snapshot(self):
+        """Test that snapshots fit in 32 bytes, can be dictionary keys, and restore every state exactly."""
+        self.assertLessEqual(SNAPSHOT_SIZE, 32)
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        states = {}
+        for move in WINNING_GAME:
+            states[game.snapshot()] = self.game_state(game)
+            game.make_move(*move)
+        states[game.to_bytes()] = self.game_state(game)
+        self.assertEqual(len(states), len(WINNING_GAME) + 1)
+        for snapshot, state in states.items():
+            self.assertEqual(len(snapshot), SNAPSHOT_SIZE)
+            game.restore(snapshot)
+            self.assertEqual(self.game_state(game), state)
+            copy_game = KubaGame.from_bytes(("PlayerA", "W"), ("PlayerB", "B"), bytearray(snapshot))
+            self.assertEqual(self.game_state(copy_game), state)
+            self.assertFalse(copy_game.unmake_move())
+
+        # The ko state survives a round trip
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        for move in KO_MOVES:
+            self.assertTrue(game.make_move(*move))
+        game = KubaGame.from_bytes(("PlayerA", "W"), ("PlayerB", "B"), game.to_bytes())
+        self.assertFalse(game.make_move("PlayerA", (1, 1), "R"))
+        self.assertRaises(ValueError, game.restore, b"")
+
+    def test_features(self):
+        """Test that the evaluation features match the board after moves, captures, and take-backs."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        features = dict(zip(FEATURE_NAMES, game.get_features()))
+        self.assertEqual([features["W row %d" % row] for row in range(7)], [2, 2, 0, 0, 0, 2, 2])
+        self.assertEqual([features["R column %d" % column] for column in range(7)], [0, 1, 3, 5, 3, 1, 0])
+        self.assertEqual((features["W perimeter"], features["W pushable"], features["R pushable"]), (6, 8, 8))
+        opening = game.get_features()
+        for move in WINNING_GAME:
+            game.make_move(*move)
+            features = dict(zip(FEATURE_NAMES, game.get_features()))
+            for marble in "WBR":
+                pushable = sum(1 for row in range(7) for column in range(7) if game.get_marble((row, column)) == marble
+                               and any(game.valid_direction(row, column, direction) for direction in "FBLR"))
+                self.assertEqual(features[marble + " pushable"], pushable)
+                self.assertEqual(sum(features["%s row %d" % (marble, row)] for row in range(7)),
+                                 game.get_marble_count()["WBR".index(marble)])
+        while game.unmake_move():
+            self.assertEqual(list(game.get_features()), board_features(game.get_masks()))
+        self.assertEqual(game.get_features(), opening)
+        try:
+            import numpy
+        except ImportError:
+            return
+        self.assertEqual(game.get_feature_vector().tolist(), list(opening))
+
+    def test_board_setup(self):
+        """Test scaled boards, custom layouts, and win thresholds."""
+        self.assertEqual(scaled_layout(7), STARTING_LAYOUT)
+        self.assertEqual(BoardSetup.scaled(7), STANDARD_SETUP)
+        self.assertRaises(ValueError, BoardSetup, ("WB", "X"))
+        self.assertRaises(ValueError, scaled_layout, 8)
+        self.assertRaises(ValueError, BoardSetup, STARTING_LAYOUT, 0)
+        self.assertRaises(ValueError, BoardSetup, STARTING_LAYOUT, 14)
+        self.assertRaises(ValueError, BoardSetup, ("WX", "XB"))
+
+        setup = BoardSetup.scaled(9)
+        self.assertEqual((setup.marbles, setup.reds_to_win), ({"W": 8, "B": 8, "R": 25}, 13))
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"), setup)
+        self.assertEqual(game.get_marble_count(), (8, 8, 25))
+        self.assertEqual(list(game.get_features()), board_features(setup.masks, setup))
+        self.assertFalse(game.make_move("PlayerA", (9, 8), "F"))
+        self.assertTrue(game.make_move("PlayerA", (8, 8), "F"))
+        self.assertEqual(game.get_marble((6, 8)), "W")
+        self.assertEqual(game.position_hash(), board_hash(game.get_masks(), setup))
+        self.assertIs(copy.deepcopy(game).get_setup(), setup)
+        self.assertEqual(pickle.loads(pickle.dumps(setup)), setup)
+
+        # Random play keeps the hash, features, take-backs, and snapshots consistent
+        rng = random.Random(9)
+        player_name, states = "PlayerB", []
+        for _ in range(120):
+            moves = game.legal_moves(player_name)
+            self.assertEqual(game._has_legal_move(player_name), bool(moves))
+            if game.get_winner() is not None or not moves:
+                break
+            states.append((self.game_state(game), game.snapshot()))
+            self.assertTrue(game.make_move(player_name, *rng.choice(moves)))
+            self.assertEqual(game.position_hash(), board_hash(game.get_masks(), setup))
+            self.assertEqual(list(game.get_features()), board_features(game.get_masks(), setup))
+            player_name = game.get_current_turn()
+        self.assertEqual(len(game.get_features()), len(setup.feature_names))
+        restored = KubaGame.from_bytes(("PlayerA", "W"), ("PlayerB", "B"), game.to_bytes(), setup)
+        self.assertEqual(self.game_state(restored), self.game_state(game))
+        while states:
+            state, snapshot = states.pop()
+            self.assertTrue(game.unmake_move())
+            self.assertEqual(self.game_state(game), state)
+            restored.restore(snapshot)
+            self.assertEqual(self.game_state(restored), state)
+
+        # Capturing reds_to_win red marbles wins, even with red marbles left
+        setup = BoardSetup(("XXXWR",
+                            "XXXXX",
+                            "XXRXX",
+                            "XXXXX",
+                            "BXXXX"), reds_to_win=1)
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"), setup)
+        self.assertTrue(game.make_move("PlayerA", (0, 3), "R"))
+        self.assertEqual(game.get_winner(), "PlayerA")
+        self.assertEqual(game.get_marble_count(), (1, 1, 1))
+
+    def game_state(self, game):
+        """Returns everything unmake_move restores as a comparable tuple."""
+        return (game.get_masks(), game.position_hash(), game._p1_prev_hash, game._p2_prev_hash,
+                list(game._player1_bank), list(game._player2_bank), game.get_current_turn(), game.get_winner())
+
+    def test_move_stats(self):
+        """Test make_move counters by outcome, rejection reason, direction, and phase."""
+        self.assertIsNone(get_move_stats())
+        stats = enable_move_stats()
+        try:
+            game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+            self.assertTrue(game.make_move(*KO_MOVES[0]))
+            self.assertFalse(game.make_move("PlayerA", (6, 6), "F"))    # Wrong turn
+            self.assertFalse(game.make_move("PlayerB", (7, 6), "F"))    # Bad coordinates
+            for move in KO_MOVES[1:]:
+                self.assertTrue(game.make_move(*move))
+            self.assertFalse(game.make_move("PlayerA", (1, 1), "R"))    # Ko
+            self.assertFalse(game.make_move("PlayerA", (0, 6), "L"))    # Not own marble
+            self.assertFalse(game.make_move("PlayerA", (0, 2), "R"))    # Blocked direction
+            self.assertFalse(game.make_move("PlayerA", (6, 5), "R"))    # Self push-off
+            self.assertFalse(game.make_move("PlayerA", (5, 6), "D"))    # Unknown direction
+            snapshot = stats.snapshot()
+            self.assertEqual(snapshot["calls"], 13)
+            self.assertEqual(snapshot["accepted"], 6)
+            self.assertEqual(snapshot["captures"], 0)
+            self.assertEqual(snapshot["rejections"], {"game over": 0, "wrong turn": 1, "bad coordinates": 1,
+                                                      "not own marble": 1, "blocked direction": 2,
+                                                      "self push-off": 1, "ko": 1})
+            self.assertEqual(snapshot["directions"]["R"], {"calls": 6, "accepted": 3, "rejected": 3, "captures": 0})
+            self.assertEqual(snapshot["directions"]["other"]["calls"], 1)
+            self.assertEqual(snapshot["phases"]["total"]["calls"], 13)
+            self.assertEqual(snapshot["phases"]["ko"]["calls"], 7)
+            self.assertEqual(snapshot["phases"]["captured"]["calls"], 0)
+            self.assertEqual(sum(snapshot["phases"]["push"]["histogram_ns"].values()), 8)
+            stats.reset()
+            self.assertEqual(stats.snapshot()["calls"], 0)
+            self.assertEqual(snapshot["calls"], 13)
+        finally:
+            disable_move_stats()
+        self.assertIsNone(get_move_stats())
+
+    def test_no_legal_moves_loss(self):
+        """Test that a player left without legal moves loses."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        game._set_masks(layout_masks(("WXXXXXX",
+                                      "XXXXXXX",
+                                      "XXXRXXX",
+                                      "XXRBRXX",
+                                      "XXXRXXX",
+                                      "XXXXXXX",
+                                      "XXXXXXX")))
+        self.assertEqual(game.legal_moves("PlayerB"), [])
+        self.assertTrue(game.make_move("PlayerA", (0, 0), "R"))
+        self.assertEqual(game.get_winner(), "PlayerA")
+        self.assertFalse(game.make_move("PlayerB", (3, 3), "F"))
+
+
+class ListKubaGame:
+    """The original list-of-lists KubaGame, kept as a reference implementation for parity tests."""
+    def __init__(self, player1, player2):
+        """
+        Creates a KubaGame with players, a board, and a marble count.
+        :param player1: A tuple containing the player name and the player's marble color (ex: ('PlayerA','W'))
+        :param player2: A tuple containing the player name and the player's marble color (ex: ('PlayerB','B'))
+        """
+        self._player1 = player1
+        self._player1_bank = [0, 0]
+        self._player2 = player2
+        self._player2_bank = [0, 0]
+        self._current_player = None
+        self._board = [["W", "W", "X", "X", "X", "B", "B"],
+                       ["W", "W", "X", "R", "X", "B", "B"],
+                       ["X", "X", "R", "R", "R", "X", "X"],
+                       ["X", "R", "R", "R", "R", "R", "X"],
+                       ["X", "X", "R", "R", "R", "X", "X"],
+                       ["B", "B", "X", "R", "X", "W", "W"],
+                       ["B", "B", "X", "X", "X", "W", "W"]]
+        self._p1_prev_board = [["W", "W", "X", "X", "X", "B", "B"],
+                               ["W", "W", "X", "R", "X", "B", "B"],
+                               ["X", "X", "R", "R", "R", "X", "X"],
+                               ["X", "R", "R", "R", "R", "R", "X"],
+                               ["X", "X", "R", "R", "R", "X", "X"],
+                               ["B", "B", "X", "R", "X", "W", "W"],
+                               ["B", "B", "X", "X", "X", "W", "W"]]
+        self._p2_prev_board = [["W", "W", "X", "X", "X", "B", "B"],
+                               ["W", "W", "X", "R", "X", "B", "B"],
+                               ["X", "X", "R", "R", "R", "X", "X"],
+                               ["X", "R", "R", "R", "R", "R", "X"],
+                               ["X", "X", "R", "R", "R", "X", "X"],
+                               ["B", "B", "X", "R", "X", "W", "W"],
+                               ["B", "B", "X", "X", "X", "W", "W"]]
+        self._winner = None
+
+    def get_current_turn(self):
+        """Returns the player name whose turn it is. Otherwise, returns None if no player has made the first move."""
+        return self._current_player
+
+    def make_move(self, player_name, coordinates, direction):
+        """
+        Makes a move on the board through user input validation.
+        :param player_name: The player's name as a string
+        :param coordinates: A tuple containing the location of the marble that is to be moved (ex: (row, column)).
+        :param direction: A direction that the player wants to push the marble. There are four valid directions:
+                          "L" (Left), "R" (Right), "F" (Forward), and "B" (Backward)
+        :return: True if the the move is valid. Otherwise, returns False if the move is invalid
+        """
+        # Validate player
+        player1 = player_name == self._player1[0]
+        player2 = player_name == self._player2[0]
+        if player1 and self._current_player is None:
+            self._current_player = player_name
+        elif player2 and self._current_player is None:
+            self._current_player = player_name
+        elif player_name != self._current_player:
+            return False
+
+        if player1:
+            player_marble = self._player1[1]
+        elif player2:
+            player_marble = self._player2[1]
+        else:
+            player_marble = None
+
+        # Validate coordinates
+        row, column = coordinates[0], coordinates[1]
+        if not 0 <= row <= 6 or not 0 <= column <= 6:
+            return False
+        elif self._board[row][column] != player_marble:
+            return False
+
+        # Validate direction
+        value = self.valid_direction(row, column, direction)
+        if not value:
+            return False
+
+        # Make move
+        move = []
+        end_index, captured_marble = None, None
+
+        # Make forward move
+        if direction == "F":
+            board_column = [rows[column] for rows in self._board]
+            for square in range(row, -1, -1):
+                if board_column[square] == "X":
+                    end_index = square
+                    break
+            if end_index is not None:
+                for square in range(len(board_column) - 1, -1, -1):
+                    if square == row:
+                        move = ["X"] + move
+                        move = [board_column[square]] + move
+                    elif square == end_index:
+                        continue
+                    else:
+                        move = [board_column[square]] + move
+            else:
+                captured_marble = board_column[0]
+                if captured_marble == player_marble:
+                    return False
+                for square in range(len(board_column) - 1, 0, -1):
+                    if square == row:
+                        move = ["X"] + move
+                        move = [board_column[square]] + move
+                    else:
+                        move = [board_column[square]] + move
+            # Replace column with move
+            index = 0
+            for row in self._board:
+                row[column] = move[index]
+                index += 1
+
+        # Make backward move
+        if direction == "B":
+            board_column = [rows[column] for rows in self._board]
+            for square in range(row, len(board_column)):
+                if board_column[square] == "X":
+                    end_index = square
+                    break
+            if end_index is not None:
+                for square in range(0, len(board_column)):
+                    if square == row:
+                        move.append("X")
+                        move.append(board_column[square])
+                    elif square == end_index:
+                        continue
+                    else:
+                        move.append(board_column[square])
+            else:
+                captured_marble = board_column[len(board_column) - 1]
+                if captured_marble == player_marble:
+                    return False
+                for square in range(0, len(board_column) - 1):
+                    if square == row:
+                        move.append("X")
+                        move.append(board_column[square])
+                    else:
+                        move.append(board_column[square])
+            # Replace column with move
+            index = 0
+            for row in self._board:
+                row[column] = move[index]
+                index += 1
+
+        # Make left move
+        if direction == "L":
+            board_row = self._board[row]
+            for square in range(column, -1, -1):
+                if board_row[square] == "X":
+                    end_index = square
+                    break
+            if end_index is not None:
+                for square in range(len(board_row) - 1, -1, -1):
+                    if square == column:
+                        move = ["X"] + move
+                        move = [board_row[square]] + move
+                    elif square == end_index:
+                        continue
+                    else:
+                        move = [board_row[square]] + move
+            else:
+                captured_marble = board_row[0]
+                if captured_marble == player_marble:
+                    return False
+                for square in range(len(board_row) - 1, 0, -1):
+                    if square == column:
+                        move = ["X"] + move
+                        move = [board_row[square]] + move
+                    else:
+                        move = [board_row[square]] + move
+            self._board[row] = move
+
+        # Make right move
+        if direction == "R":
+            board_row = self._board[row]
+            for square in range(column, len(board_row)):
+                if board_row[square] == "X":
+                    end_index = square
+                    break
+            if end_index is not None:
+                for square in range(0, len(board_row)):
+                    if square == column:
+                        move.append("X")
+                        move.append(board_row[square])
+                    elif square == end_index:
+                        continue
+                    else:
+                        move.append(board_row[square])
+            else:
+                captured_marble = board_row[len(board_row) - 1]
+                if captured_marble == player_marble:
+                    return False
+                for square in range(0, len(board_row) - 1):
+                    if square == column:
+                        move.append("X")
+                        move.append(board_row[square])
+                    else:
+                        move.append(board_row[square])
+            self._board[row] = move
+
+        # Check to see if move is valid; check ko rule
+        if player1:
+            if self._p1_prev_board == self._board:
+                self._board = []
+                for row in self._p2_prev_board:
+                    self._board.append(list(row))
+                return False
+            else:
+                self._p1_prev_board = []
+                for row in self._board:
+                    self._p1_prev_board.append(list(row))
+        else:
+            if self._p2_prev_board == self._board:
+                self._board = []
+                for row in self._p1_prev_board:
+                    self._board.append(list(row))
+                return False
+            else:
+                self._p2_prev_board = []
+                for row in self._board:
+                    self._p2_prev_board.append(list(row))
+
+        # If a marble was captured, record marble, and evaluate win
+        winner = None
+        if captured_marble:
+            winner = self.captured(captured_marble, player1, player2)
+
+        if winner is not None:
+            self._winner = winner
+        elif player1:
+            self._current_player = self._player2[0]
+        else:
+            self._current_player = self._player1[0]
+
+        return True
+
+    def valid_direction(self, row, column, direction):
+        """
+        Helper function for make_move to validate the direction of the player's move.
+        :param row: The row number as an integer of the marble to be moved
+        :param column: The column number as an integer of the marble to be moved
+        :param direction: A valid direction as a char to move the marble
+        :return: True if the direction is valid. Else, False if the direction is invalid.
+        """
+        forward1, back1, right1, left1 = row - 1, row + 1, column + 1, column - 1
+
+        # Validate forward
+        if direction == "F" and back1 != 7:
+            if row == 0 or self._board[back1][column] != "X":
+                return False
+
+        # Validate backward
+        if direction == "B" and forward1 != -1:
+            if row == 6 or self._board[forward1][column] != "X":
+                return False
+
+        # Validate right
+        if direction == "R" and left1 != -1:
+            if column == 6 or self._board[row][left1] != "X":
+                return False
+
+        # Validate left
+        if direction == "L" and right1 != 7:
+            if column == 0 or self._board[row][right1] != "X":
+                return False
+
+        return True
+
+    def captured(self, captured_marble, player1, player2):
+        """
+        Helper function for make_move to determine a winner from the move made.
+        :param captured_marble: The color of the captured marble as a char ("W", "B", or "R")
+        :param player1: True if the player is player1. Else, False if the player is player2.
+        :param player2: False if the player is player1. Else, True if the player is player2.
+        :return: Player's name if that player is the winner. Else, None if there is no winner.
+        """
+        if player1 and captured_marble == "R":
+            self._player1_bank[0] += 1
+        elif player1 and captured_marble == self._player2[1]:
+            self._player1_bank[1] += 1
+        elif player2 and captured_marble == "R":
+            self._player2_bank[0] += 1
+        else:
+            self._player2_bank[1] += 1
+
+        if self._player1_bank[0] == 7 or self._player1_bank[1] == 8:
+            return self._player1[0]
+        elif self._player2_bank[0] == 7 or self._player2_bank[1] == 8:
+            return self._player2[0]
+        else:
+            return
+
+    def get_winner(self):
+        """Returns the name of the winning player."""
+        return self._winner
+
+    def get_captured(self, player_name):
+        """Returns the number of Red marbles captured by the given player name. Else, returns None."""
+        if player_name == self._player1[0]:
+            return self._player1_bank[0]
+        elif player_name == self._player2[0]:
+            return self._player2_bank[0]
+        else:
+            return
+
+    def get_marble(self, coordinates):
+        """Returns the marble that is present at the coordinate location."""
+        return self._board[coordinates[0]][coordinates[1]]
+
+    def get_marble_count(self):
+        """Returns the number of white, black, and red marbles as a tuple in the order (W,B,R)."""
+        if self._player1[1] == "W":
+            white_captured = self._player2_bank[1]
+            black_captured = self._player1_bank[1]
+        else:
+            white_captured = self._player1_bank[1]
+            black_captured = self._player2_bank[1]
+        red_captured = self._player1_bank[0] + self._player2_bank[0]
+
+        total_white = 8 - white_captured
+        total_black = 8 - black_captured
+        total_red = 13 - red_captured
+
+        return total_white, total_black, total_red
+
+
+class ParityTests(unittest.TestCase):
+    def assert_same_state(self, game, reference):
+        """Asserts that the bitboard game and the list reference game are in the same state."""
+        for row in range(7):
+            for column in range(7):
+                self.assertEqual(game.get_marble((row, column)), reference._board[row][column])
+        self.assertEqual(game.get_marble_count(), reference.get_marble_count())
+        self.assertEqual(game.get_captured("PlayerA"), reference.get_captured("PlayerA"))
+        self.assertEqual(game.get_captured("PlayerB"), reference.get_captured("PlayerB"))
+        self.assertEqual(game.get_current_turn(), reference.get_current_turn())
+        self.assertEqual(game.get_winner(), reference.get_winner())
+        self.assertEqual(game.position_hash(), board_hash(game.get_masks()))
+        self.assertEqual(list(game.get_features()), board_features(game.get_masks()))
+
+    def test_random_games(self):
+        """Test that every move the list implementation accepts or rejects is accepted or rejected identically."""
+        rng = random.Random(2021)
+        for _ in range(8):
+            game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+            reference = ListKubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+            colors = {"PlayerA": "W", "PlayerB": "B"}
+            for _ in range(150):
+                players = [reference.get_current_turn()] if reference.get_current_turn() else ["PlayerA", "PlayerB"]
+                accepted = []
+                for player in players:
+                    for row in range(7):
+                        for column in range(7):
+                            if reference._board[row][column] != colors[player]:
+                                continue
+                            for direction in "FBLR":
+                                move = (player, (row, column), direction)
+                                # Before the first move a rejected move still claims the turn, which cannot be undone
+                                trial = copy.deepcopy(game) if game.get_current_turn() is None else game
+                                trial_reference = copy.deepcopy(reference)
+                                result = trial_reference.make_move(*move)
+                                self.assertEqual(trial.make_move(*move), result, move)
+                                self.assert_same_state(trial, trial_reference)
+                                if result and trial is game:
+                                    self.assertTrue(game.unmake_move())
+                                    self.assert_same_state(game, reference)
+                                if result:
+                                    accepted.append(move)
+                if reference.get_current_turn():
+                    self.assertEqual(sorted(game.legal_moves(players[0])),
+                                     sorted((coordinates, direction) for _, coordinates, direction in accepted))
+                if not accepted:
+                    break
+                move = rng.choice(accepted)
+                self.assertTrue(reference.make_move(*move))
+                self.assertTrue(game.make_move(*move))
+                self.assert_same_state(game, reference)
+                if reference.get_winner() is not None:
+                    break
@@ -0,0 +1,351 @@
+# Author: Andy Phung
+# Date: 10/18/2026
+# Description: Class MCTSPlayer is a Monte Carlo tree search computer opponent for KubaGame. Each worker process grows
+#              its own UCT tree from the current position with random playouts (root parallelism), and the root
+#              visit counts of all workers are added up to choose the move. Playouts run on PlayoutState, a slotted
+#              copy of the game rules whose clone only copies a few immutable fields. With a playout budget the
+#              chosen move is the same for a fixed seed and worker count.
+
+import math
+import multiprocessing
+import random
+import time
+from KubaGame import BOARD_SIZE, DIRECTIONS, STANDARD_SETUP, ZOBRIST_KEYS
+
+MARBLES = ("W", "B", "R")
+RED = 2
+_DIRECTION_NAMES = list(DIRECTIONS)
+_KEYS = [ZOBRIST_KEYS[marble] for marble in MARBLES]
+
+
+def _push_tables():
+    """
+    Builds lookup tables indexed by [direction index][square].
+    :return: A tuple of the squares a push travels through from the pushed marble to the edge, the bit of the square
+             behind the marble (0 on the edge), and the square offset of one step in each direction
+    """
+    paths, behind, shifts = [], [], []
+    for row_step, column_step in DIRECTIONS.values():
+        paths.append([])
+        behind.append([])
+        shifts.append(row_step * BOARD_SIZE + column_step)
+        for square in range(BOARD_SIZE * BOARD_SIZE):
+            row, column = divmod(square, BOARD_SIZE)
+            path = []
+            while 0 <= row < BOARD_SIZE and 0 <= column < BOARD_SIZE:
+                path.append(row * BOARD_SIZE + column)
+                row, column = row + row_step, column + column_step
+            paths[-1].append(tuple(path))
+            row, column = divmod(square, BOARD_SIZE)
+            row, column = row - row_step, column - column_step
+            on_board = 0 <= row < BOARD_SIZE and 0 <= column < BOARD_SIZE
+            behind[-1].append(1 << (row * BOARD_SIZE + column) if on_board else 0)
+    return paths, behind, shifts
+
+
+_PATHS, _BEHIND, _SHIFTS = _push_tables()
+
+
+class PlayoutState:
+    """
+    Represents a Kuba position for playouts. Every field is an immutable int or tuple, so clone is a shallow copy.
+    Moves are (square, direction index, run, edge, captured, new hash) tuples made by legal_moves or try_move.
+    """
+    __slots__ = ("masks", "hash", "ko", "banks", "colors", "turn", "winner")
+
+    @classmethod
+    def from_game(cls, game, player_name):
+        """
+        Copies the position of a KubaGame.
+        :param game: A KubaGame object on the standard board that is not over
+        :param player_name: The name of the player to move
+        :return: A PlayoutState with the same board, captures, and ko state
+        """
+        if game.get_setup() != STANDARD_SETUP:
+            raise ValueError("Playouts only support the standard board")
+        state = cls()
+        state.masks = game._bitboards
+        state.hash = game.position_hash()
+        state.ko = (game._p1_prev_hash, game._p2_prev_hash)
+        state.banks = tuple(game._player1_bank) + tuple(game._player2_bank)
+        state.colors = (MARBLES.index(game._player1[1]), MARBLES.index(game._player2[1]))
+        state.turn = 0 if player_name == game._player1[0] else 1
+        state.winner = None
+        return state
+
+    def clone(self):
+        """Returns a copy of the state."""
+        state = PlayoutState()
+        state.masks, state.hash, state.ko, state.banks = self.masks, self.hash, self.ko, self.banks
+        state.colors, state.turn, state.winner = self.colors, self.turn, self.winner
+        return state
+
+    def try_move(self, square, direction):
+        """
+        Checks one move of the player to move, following the same rules as KubaGame.make_move.
+        :param square: The square of the marble to be moved (row * 7 + column)
+        :param direction: The index of the direction in DIRECTIONS
+        :return: The move tuple if the move is legal. Otherwise, returns None.
+        """
+        white, black, red = masks = self.masks
+        color = self.colors[self.turn]
+        path = _PATHS[direction][square]
+        if not masks[color] >> square & 1 or len(path) < 2 or (white | black | red) & _BEHIND[direction][square]:
+            return None
+
+        # Collect the run of marbles, updating the hash for each marble that moves or is pushed off
+        shift = _SHIFTS[direction]
+        new_hash, run, edge, captured = self.hash, 0, 0, None
+        last = path[-1]
+        for current in path:
+            bit = 1 << current
+            if white & bit:
+                marble = 0
+            elif black & bit:
+                marble = 1
+            elif red & bit:
+                marble = 2
+            else:
+                break
+            run |= bit
+            keys = _KEYS[marble]
+            if current == last:
+                edge, captured = bit, marble
+                new_hash ^= keys[current]
+            else:
+                new_hash ^= keys[current] ^ keys[current + shift]
+
+        if captured == color or new_hash == self.ko[self.turn]:
+            return None
+        return square, direction, run, edge, captured, new_hash
+
+    def legal_moves(self):
+        """Returns every legal move of the player to move as a list of move tuples."""
+        moves = []
+        remaining = self.masks[self.colors[self.turn]]
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            square = bit.bit_length() - 1
+            for direction in range(4):
+                move = self.try_move(square, direction)
+                if move is not None:
+                    moves.append(move)
+        return moves
+
+    def play(self, move):
+        """
+        Makes a legal move. A capture that wins sets winner; a player who is left without legal moves is not detected
+        here, but by legal_moves returning an empty list on that player's turn.
+        """
+        _, direction, run, edge, captured, new_hash = move
+        shift = _SHIFTS[direction]
+        masks = []
+        for mask in self.masks:
+            moving = mask & run & ~edge
+            masks.append(mask & ~run | (moving << shift if shift > 0 else moving >> -shift))
+        self.masks = tuple(masks)
+        self.hash = new_hash
+        turn = self.turn
+        self.ko = (new_hash, self.ko[1]) if turn == 0 else (self.ko[0], new_hash)
+
+        if captured is not None:
+            banks = list(self.banks)
+            banks[2 * turn + (0 if captured == RED else 1)] += 1
+            self.banks = tuple(banks)
+            if banks[2 * turn] == 7 or banks[2 * turn + 1] == 8:
+                self.winner = turn
+                return
+        self.turn = 1 - turn
+
+    def playout(self, rng, max_moves):
+        """
+        Plays random legal moves until the game ends.
+        :param rng: A random.Random object
+        :param max_moves: The number of moves after which the playout stops without a winner
+        :return: The index of the winning player (0 or 1), or None if the playout was stopped
+        """
+        for _ in range(max_moves):
+            if self.winner is not None:
+                return self.winner
+
+            # Sample marble and direction pairs until one is legal, which picks uniformly among the legal moves
+            remaining, squares = self.masks[self.colors[self.turn]], []
+            while remaining:
+                bit = remaining & -remaining
+                remaining ^= bit
+                squares.append(bit.bit_length() - 1)
+            move = None
+            for _ in range(8):
+                move = self.try_move(squares[rng.randrange(len(squares))], rng.randrange(4))
+                if move is not None:
+                    break
+            if move is None:
+                moves = self.legal_moves()
+                if not moves:
+                    return 1 - self.turn
+                move = moves[rng.randrange(len(moves))]
+            self.play(move)
+        return self.winner
+
+
+class _Node:
+    """Represents a node of a UCT tree. Wins are counted for the player who made the move into the node."""
+    __slots__ = ("move", "parent", "player", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, parent, player, untried):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+
+def search_tree(state, seed, playouts, time_limit, exploration, max_playout_moves):
+    """
+    Grows one UCT tree from a position.
+    :param state: The PlayoutState to search from
+    :param seed: The random seed as an integer
+    :param playouts: The number of playouts to run
+    :param time_limit: A time budget in seconds that stops the search early, or None
+    :param exploration: The UCT exploration constant
+    :param max_playout_moves: The number of moves after which a playout counts as a draw
+    :return: A list of ((square, direction index), visits, wins) tuples for the root moves
+    """
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    root = _Node(None, None, 1 - state.turn, state.legal_moves())
+    for count in range(playouts):
+        if deadline is not None and not count & 15 and time.perf_counter() > deadline:
+            break
+        node, current = root, state.clone()
+
+        # Select
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.wins / child.visits +
+                       exploration * math.sqrt(log_visits / child.visits))
+            current.play(node.move)
+
+        # Expand
+        if node.untried:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            player = current.turn
+            current.play(move)
+            child = _Node(move, node, player, current.legal_moves() if current.winner is None else [])
+            node.children.append(child)
+            node = child
+
+        # Simulate
+        if current.winner is None and not node.untried and not node.children:
+            winner = 1 - current.turn
+        else:
+            winner = current.playout(rng, max_playout_moves)
+
+        # Backpropagate
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.player:
+                node.wins += 1
+            node = node.parent
+    return [(child.move[:2], child.visits, child.wins) for child in root.children]
+
+
+def _search_worker(args):
+    """Runs search_tree in a pool worker."""
+    return search_tree(*args)
+
+
+class MCTSPlayer:
+    """
+    Represents a Monte Carlo tree search player that can spread its search over a process pool. The pool is started
+    by the first search and kept for later moves, so a player with several workers should be closed, or used in a
+    with statement, when it is no longer needed.
+    """
+    def __init__(self, playouts=1000, time_limit=None, workers=1, seed=0, exploration=1.4, max_playout_moves=200):
+        """
+        Creates an MCTS player.
+        :param playouts: The number of playouts per worker for each move
+        :param time_limit: A time budget per move in seconds, or None to only use the playout budget. Stopping on time
+                           makes the chosen move depend on machine speed.
+        :param workers: The number of worker processes, each growing its own tree. With 1 worker the search runs in
+                        the calling process.
+        :param seed: The random seed as an integer
+        :param exploration: The UCT exploration constant
+        :param max_playout_moves: The number of moves after which a playout counts as a draw
+        """
+        self._playouts = playouts
+        self._time_limit = time_limit
+        self._workers = workers
+        self._seed = seed
+        self._exploration = exploration
+        self._max_playout_moves = max_playout_moves
+        self._stats = {}
+        self._pool = None
+
+    def __call__(self, game, player_name, rng=None):
+        """Chooses a move for the player, so an MCTSPlayer can be used as a KubaTournament policy."""
+        return self.choose_move(game, player_name)
+
+    def __getstate__(self):
+        """Leaves the process pool out of a pickled player, such as a policy sent to KubaTournament workers."""
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
+
+    def close(self):
+        """Stops the worker processes. A later search starts a new pool."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def choose_move(self, game, player_name):
+        """
+        Searches for the best move of a player. The game is not changed.
+        :param game: A KubaGame object that is not over
+        :param player_name: The name of the player to move
+        :return: The most visited move as a (coordinates, direction) tuple, or None if the player has no legal moves
+        """
+        start = time.perf_counter()
+        state = PlayoutState.from_game(game, player_name)
+        # Seed each worker from the position so the same position always gets the same search
+        jobs = [(state, (self._seed * 2 ** 64 + state.hash) * 256 + worker, self._playouts, self._time_limit,
+                 self._exploration, self._max_playout_moves) for worker in range(self._workers)]
+        if self._workers == 1:
+            trees = [search_tree(*jobs[0])]
+        else:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self._workers)
+            trees = self._pool.map(_search_worker, jobs)
+
+        visits, wins = {}, {}
+        for tree in trees:
+            for move, move_visits, move_wins in tree:
+                visits[move] = visits.get(move, 0) + move_visits
+                wins[move] = wins.get(move, 0.0) + move_wins
+        best = max(sorted(visits), key=lambda move: (visits[move], wins[move]), default=None)
+
+        def to_move(move):
+            """Converts a (square, direction index) pair to a KubaGame (coordinates, direction) move."""
+            return divmod(move[0], BOARD_SIZE), _DIRECTION_NAMES[move[1]]
+
+        self._stats = {"playouts": sum(visits.values()),
+                       "seconds": time.perf_counter() - start,
+                       "visits": {to_move(move): count for move, count in visits.items()},
+                       "win_rate": wins[best] / visits[best] if best is not None else None}
+        return to_move(best) if best is not None else None
+
+    def get_stats(self):
+        """Returns the statistics of the last search as a dictionary."""
+        return dict(self._stats)
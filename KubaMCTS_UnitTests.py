@@ -0,0 +1,66 @@
+import pickle
+import random
+import unittest
+from KubaBenchmark import WINNING_GAME
+from KubaGame import KubaGame
+from KubaMCTS import MCTSPlayer, PlayoutState
+
+
+class UnitTests(unittest.TestCase):
+    def test_playout_state_matches_kuba_game(self):
+        """Test the playout rules and clone against KubaGame over random games."""
+        rng = random.Random(11)
+        for _ in range(6):
+            game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+            player = "PlayerA"
+            state = PlayoutState.from_game(game, player)
+            while game.get_winner() is None:
+                moves = state.legal_moves()
+                expected = game.legal_moves(player)
+                self.assertEqual(sorted((divmod(move[0], 7), "FBLR"[move[1]]) for move in moves), sorted(expected))
+                move = rng.choice(moves)
+                before = state.clone()
+                state.play(move)
+                self.assertNotEqual(before.masks, state.masks)
+                self.assertTrue(game.make_move(player, divmod(move[0], 7), "FBLR"[move[1]]))
+                self.assertEqual(state.hash, game.position_hash())
+                self.assertEqual(state.banks, tuple(game._player1_bank) + tuple(game._player2_bank))
+                if game.get_winner() is not None and state.winner is None:
+                    self.assertEqual(state.legal_moves(), [])    # Left without legal moves
+                player = game.get_current_turn()
+
+    def test_playout(self):
+        """Test that a playout finishes a game and does not change the state it was cloned from."""
+        state = PlayoutState.from_game(KubaGame(("PlayerA", "W"), ("PlayerB", "B")), "PlayerB")
+        copy = state.clone()
+        self.assertIn(copy.playout(random.Random(1), 1000), (0, 1))
+        self.assertEqual((state.turn, state.winner, state.banks), (1, None, (0, 0, 0, 0)))
+
+    def test_deterministic(self):
+        """Test that a fixed seed and worker count always choose the same move."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        self.assertTrue(game.make_move("PlayerA", (6, 5), "F"))
+        with MCTSPlayer(playouts=40, workers=2, seed=5, max_playout_moves=60) as player:
+            move = player.choose_move(game, "PlayerB")
+            visits = player.get_stats()["visits"]
+            pool = player._pool
+            self.assertIn(move, game.legal_moves("PlayerB"))
+            self.assertEqual(sum(visits.values()), 80)
+            with MCTSPlayer(playouts=40, workers=2, seed=5, max_playout_moves=60) as other:
+                self.assertEqual(other.choose_move(game, "PlayerB"), move)
+            self.assertIsNone(other._pool)
+
+            # The pool is kept between moves and left out of a pickled player
+            self.assertEqual(player.choose_move(game, "PlayerB"), move)
+            self.assertIs(player._pool, pool)
+            self.assertEqual(player.get_stats()["visits"], visits)
+            self.assertIsNone(pickle.loads(pickle.dumps(player))._pool)
+        self.assertIsNone(player._pool)
+        self.assertEqual(game.get_current_turn(), "PlayerB")
+
+    def test_finds_winning_capture(self):
+        """Test that the search captures the seventh red marble."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        for move in WINNING_GAME[:-1]:
+            self.assertTrue(game.make_move(*move))
+        self.assertEqual(MCTSPlayer(playouts=300, seed=1).choose_move(game, "PlayerA"), ((4, 3), "B"))
@@ -0,0 +1,188 @@
+# Author: Andy Phung
+# Date: 10/18/2026
+# Description: A compact binary format for KubaGame records. A move is stored in one byte as square * 4 + direction,
+#              where square is row * 7 + column and direction is the index of "F", "B", "L", or "R". A record has a
+#              small header with both players and the first player, followed by its moves. An archive file holds
+#              many records and an index of their offsets. ArchiveReader memory-maps an archive and replays its
+#              games lazily through KubaGame, so an archive is never read into memory as a whole.
+
+import mmap
+import struct
+from KubaGame import KubaGame, decode_move, encode_move
+
+# Record header: move count, first player (0 or 1), player colors, and the lengths of the two UTF-8 player names
+_RECORD_HEADER = struct.Struct("<IBccBB")
+
+# Archive layout: magic, records, one little-endian offset per record, then the footer
+ARCHIVE_MAGIC = b"KUBAREC1"
+_INDEX_ENTRY = struct.Struct("<Q")
+_FOOTER = struct.Struct("<QQ8s")
+_FOOTER_MAGIC = b"KUBAIDX1"
+
+
+def encode_game(player1, player2, first_player, moves):
+    """
+    Encodes one game record.
+    :param player1: A tuple containing the player name and the player's marble color (ex: ('PlayerA','W'))
+    :param player2: A tuple containing the player name and the player's marble color (ex: ('PlayerB','B'))
+    :param first_player: 0 if player1 made the first move, 1 if player2 did
+    :param moves: A sequence of (coordinates, direction) moves in the order they were made
+    :return: The record as bytes
+    """
+    name1, name2 = player1[0].encode("utf-8"), player2[0].encode("utf-8")
+    header = _RECORD_HEADER.pack(len(moves), first_player, player1[1].encode("ascii"), player2[1].encode("ascii"),
+                                 len(name1), len(name2))
+    return header + name1 + name2 + bytes(encode_move(*move) for move in moves)
+
+
+def decode_game(data, offset=0):
+    """
+    Decodes the header of one game record without copying its moves.
+    :param data: A bytes-like object holding the record
+    :param offset: The position of the record in data
+    :return: A tuple of player1, player2, the first player (0 or 1), and a memoryview of the move codes
+    """
+    count, first_player, color1, color2, length1, length2 = _RECORD_HEADER.unpack_from(data, offset)
+    start = offset + _RECORD_HEADER.size
+    view = memoryview(data)
+    name1 = bytes(view[start:start + length1]).decode("utf-8")
+    name2 = bytes(view[start + length1:start + length1 + length2]).decode("utf-8")
+    start += length1 + length2
+    return (name1, color1.decode("ascii")), (name2, color2.decode("ascii")), first_player, view[start:start + count]
+
+
+def replay(player1, player2, first_player, codes):
+    """
+    Replays a game record through KubaGame.
+    :return: A generator that makes each move and yields the same KubaGame object after every move. Raises ValueError
+             if make_move rejects a move.
+    """
+    game = KubaGame(player1, player2)
+    player_name = (player1[0], player2[0])[first_player]
+    for number, code in enumerate(codes):
+        coordinates, direction = decode_move(code)
+        if not game.make_move(player_name, coordinates, direction):
+            raise ValueError("Move %d %s %s was rejected" % (number, coordinates, direction))
+        yield game
+        player_name = game.get_current_turn()
+
+
+class ArchiveWriter:
+    """Represents an archive file being written one game record at a time."""
+    def __init__(self, path):
+        """Creates or overwrites the archive file at path."""
+        self._file = open(path, "wb")
+        self._file.write(ARCHIVE_MAGIC)
+        self._offsets = []
+
+    def add(self, player1, player2, first_player, moves):
+        """Appends a game record. The arguments are the same as for encode_game."""
+        self._offsets.append(self._file.tell())
+        self._file.write(encode_game(player1, player2, first_player, moves))
+
+    def close(self):
+        """Writes the index and footer and closes the file."""
+        index_offset = self._file.tell()
+        for offset in self._offsets:
+            self._file.write(_INDEX_ENTRY.pack(offset))
+        self._file.write(_FOOTER.pack(index_offset, len(self._offsets), _FOOTER_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ArchiveReader:
+    """Represents a memory-mapped archive file whose records are read only when they are used."""
+    def __init__(self, path):
+        """Opens and memory-maps the archive file at path."""
+        with open(path, "rb") as archive:
+            self._map = mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+            self._map.close()
+            raise ValueError("%s is not a Kuba archive" % path)
+        self._index_offset, self._count, magic = _FOOTER.unpack_from(self._map, len(self._map) - _FOOTER.size)
+        if magic != _FOOTER_MAGIC:
+            self._map.close()
+            raise ValueError("%s has no archive index" % path)
+
+    def __len__(self):
+        """Returns the number of game records."""
+        return self._count
+
+    def record(self, index):
+        """
+        Reads one record.
+        :param index: The record number as an integer
+        :return: A tuple of player1, player2, the first player, and a memoryview of the move codes. The memoryview
+                 points into the mapped file and must be released before the archive is closed.
+        """
+        if not 0 <= index < self._count:
+            raise IndexError("Record %d is out of range" % index)
+        offset = _INDEX_ENTRY.unpack_from(self._map, self._index_offset + index * _INDEX_ENTRY.size)[0]
+        return decode_game(self._map, offset)
+
+    def positions(self, index):
+        """
+        Returns a generator yielding the KubaGame of one record after each move. The move codes are copied out of
+        the mapped file, so the archive can be closed before the generator is finished.
+        """
+        player1, player2, first_player, codes = self.record(index)
+        with codes:
+            return replay(player1, player2, first_player, bytes(codes))
+
+    def position(self, index, move_number):
+        """
+        Seeks to one position of a record without validating its moves, so the record should have passed validate.
+        :param index: The record number as an integer
+        :param move_number: The number of moves to make, from 0 up to the length of the record
+        :return: A KubaGame object after that many moves
+        """
+        player1, player2, first_player, codes = self.record(index)
+        game = KubaGame(player1, player2)
+        with codes, codes[:move_number] as moves:
+            game.apply_moves(moves, first_player=(player1[0], player2[0])[first_player])
+        return game
+
+    def results(self):
+        """
+        Replays every record. A record with a move that make_move rejects is replayed up to that move and does not
+        stop the other records from being replayed.
+        :return: A generator yielding (index, winner, move count, (W, B, R) marble count, bad move) for each record,
+                 where bad move is the number of the first rejected move, or None if every move was made
+        """
+        for index in range(self._count):
+            player1, player2 = self.record(index)[:2]
+            game, count, bad_move = KubaGame(player1, player2), 0, None
+            try:
+                for game in self.positions(index):
+                    count += 1
+            except ValueError:
+                bad_move = count
+            yield index, game.get_winner(), count, game.get_marble_count(), bad_move
+
+    def validate(self):
+        """
+        Replays every record and reports those with a move that make_move would reject or an invalid move code.
+        :return: A generator yielding (index, move number) for the first bad move of each bad record
+        """
+        for index in range(self._count):
+            count = 0
+            try:
+                for _ in self.positions(index):
+                    count += 1
+            except ValueError:
+                yield index, count
+
+    def close(self):
+        """Unmaps the archive file."""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
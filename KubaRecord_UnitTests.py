@@ -0,0 +1,98 @@
+import os
+import random
+import tempfile
+import unittest
+from KubaGame import KubaGame
+from KubaRecord import ArchiveReader, ArchiveWriter, decode_game, decode_move, encode_game, encode_move
+
+
+def random_game(rng):
+    """Plays a random game and returns its record arguments and the finished KubaGame."""
+    player1, player2 = ("PlayerA", "W"), ("PlayerB", "B")
+    first_player = rng.randrange(2)
+    game = KubaGame(player1, player2)
+    player_name, moves = (player1[0], player2[0])[first_player], []
+    while game.get_winner() is None and len(moves) < 300:
+        move = rng.choice(game.legal_moves(player_name))
+        game.make_move(player_name, *move)
+        moves.append(move)
+        player_name = game.get_current_turn()
+    return (player1, player2, first_player, moves), game
+
+
+class UnitTests(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".kuba")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_move_codes(self):
+        """Test that every move fits in one byte and decodes to itself."""
+        codes = set()
+        for row in range(7):
+            for column in range(7):
+                for direction in "FBLR":
+                    code = encode_move((row, column), direction)
+                    self.assertEqual(decode_move(code), ((row, column), direction))
+                    codes.add(code)
+        self.assertEqual(codes, set(range(196)))
+        self.assertRaises(ValueError, encode_move, (7, 0), "F")
+        self.assertRaises(ValueError, decode_move, 196)
+
+    def test_record(self):
+        """Test that a record holds the players, the first player, and one byte per move."""
+        moves = [((6, 5), "F"), ((0, 6), "B")]
+        data = encode_game(("Ána", "B"), ("PlayerB", "W"), 1, moves)
+        player1, player2, first_player, codes = decode_game(data)
+        self.assertEqual((player1, player2, first_player), (("Ána", "B"), ("PlayerB", "W"), 1))
+        self.assertEqual([decode_move(code) for code in codes], moves)
+        self.assertEqual(len(data), 9 + len("Ána".encode("utf-8")) + len("PlayerB") + 2)
+
+    def test_archive(self):
+        """Test writing an archive and replaying its games lazily."""
+        rng = random.Random(3)
+        games = [random_game(rng) for _ in range(5)]
+        with ArchiveWriter(self.path) as writer:
+            for arguments, _ in games:
+                writer.add(*arguments)
+
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(len(reader), 5)
+            for index, (arguments, finished) in enumerate(games):
+                player1, player2, first_player, codes = reader.record(index)
+                self.assertEqual((player1, player2, first_player), arguments[:3])
+                self.assertEqual(len(codes), len(arguments[3]))
+                del codes
+            positions = list(game.position_hash() for game in reader.positions(2))
+            self.assertEqual(len(positions), len(games[2][0][3]))
+            self.assertEqual(positions[-1], games[2][1].position_hash())
+            self.assertEqual(reader.position(2, 10).position_hash(), positions[9])
+            self.assertEqual(reader.position(2, len(positions)).get_winner(), games[2][1].get_winner())
+            results = list(reader.results())
+            self.assertEqual([result[1:] for result in results],
+                             [(game.get_winner(), len(arguments[3]), game.get_marble_count(), None)
+                              for arguments, game in games])
+            self.assertEqual(list(reader.validate()), [])
+            self.assertRaises(IndexError, reader.record, 5)
+            unfinished = reader.positions(2)
+            next(unfinished)
+        # The generator holds a copy of the move codes, so it does not keep the archive from closing
+        self.assertEqual(len(list(unfinished)), len(positions) - 1)
+
+    def test_validate(self):
+        """Test that the validator flags records with moves make_move rejects."""
+        rng = random.Random(4)
+        (player1, player2, first_player, moves), _ = random_game(rng)
+        with ArchiveWriter(self.path) as writer:
+            writer.add(player1, player2, first_player, moves)
+            writer.add(player1, player2, first_player, moves[:3] + [((3, 3), "F")] + moves[4:])
+            writer.add(player1, player2, 1 - first_player, moves)
+            writer.add(player1, player2, first_player, [])
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(list(reader.validate()), [(1, 3), (2, 0)])
+            results = list(reader.results())
+            self.assertEqual([(index, count, bad_move) for index, _, count, _, bad_move in results],
+                             [(0, len(moves), None), (1, 3, 3), (2, 0, 0), (3, 0, None)])
+            self.assertIsNone(results[1][1])
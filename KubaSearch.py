@@ -0,0 +1,273 @@
+# Author: Andy Phung
+# Date: 10/18/2026
+# Description: Class SearchPlayer is a computer opponent for KubaGame. It runs an iterative deepening alpha-beta
+#              (negamax) search within a time budget, trying transposition table moves, captures, and pushes toward
+#              the edge first. Positions are scored by captured red marbles and remaining marble counts. The
+#              transposition table has a fixed number of slots so memory stays flat over long sessions.
+
+import random
+import time
+
+WIN_SCORE = 1000000
+RED_WEIGHT = 100
+MARBLE_WEIGHT = 60
+
+# Transposition table bound flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Mixed into the position hash when the second player is to move, and multiplied by the captured marble counts
+_KEY_GENERATOR = random.Random(0x5349444)
+_SIDE_KEY = _KEY_GENERATOR.getrandbits(64)
+_BANK_KEYS = [_KEY_GENERATOR.getrandbits(64) | 1 for _ in range(4)]
+_KEY_MASK = (1 << 64) - 1
+
+
+def _to_table(score, ply):
+    """
+    Helper function that converts a score for the transposition table. Win and loss scores count the moves from the
+    root, so they are stored as the moves from the position ply moves deep, which is the same from any root.
+    """
+    if score >= WIN_SCORE // 2:
+        return score + ply
+    if score <= -WIN_SCORE // 2:
+        return score - ply
+    return score
+
+
+def _from_table(score, ply):
+    """Helper function that converts a transposition table score back to a score counted from the root."""
+    if score >= WIN_SCORE // 2:
+        return score - ply
+    if score <= -WIN_SCORE // 2:
+        return score + ply
+    return score
+
+
+class SearchPlayer:
+    """Represents an alpha-beta search player with a bounded transposition table."""
+    def __init__(self, time_limit=1.0, max_depth=64, table_bits=18):
+        """
+        Creates a search player.
+        :param time_limit: The time budget per move in seconds
+        :param max_depth: The deepest iteration of the search as an integer
+        :param table_bits: The transposition table has 2 ** table_bits slots
+        """
+        self._time_limit = time_limit
+        self._max_depth = max_depth
+        self._table = [None] * (1 << table_bits)
+        self._table_mask = (1 << table_bits) - 1
+        self._table_used = 0
+        self._generation = 0
+        self._stats = {}
+        self._reset_search()
+
+    def __call__(self, game, player_name, rng=None):
+        """Chooses a move for the player, so a SearchPlayer can be used as a KubaTournament policy."""
+        return self.choose_move(game, player_name)
+
+    def _reset_search(self):
+        """Clears the per-search counters."""
+        self._nodes = 0
+        self._tt_probes = 0
+        self._tt_hits = 0
+        self._stopped = False
+        self._deadline = None
+
+    def choose_move(self, game, player_name):
+        """
+        Searches for the best move of a player. The game is returned to its current position when the search ends.
+        :param game: A KubaGame object that is not over
+        :param player_name: The name of the player to move
+        :return: The best move found as a (coordinates, direction) tuple, or None if the player has no legal moves.
+                 Raises ValueError if the game is over or it is not the player's turn.
+        """
+        if game.get_winner() is not None:
+            raise ValueError("The game is over")
+        if game.get_current_turn() not in (None, player_name):
+            raise ValueError("It is not %s's turn" % player_name)
+        self._reset_search()
+        self._generation += 1
+        self._deadline = time.perf_counter() + self._time_limit
+        start = time.perf_counter()
+        players = (game._player1, game._player2)
+        self._second_player = game._player2[0]
+        self._colors = {name: color for name, color in players}
+        opponent = players[0][0] if player_name == players[1][0] else players[1][0]
+
+        best_move, best_score, depth_reached, iteration_nodes = None, None, 0, []
+        for depth in range(1, self._max_depth + 1):
+            nodes_before = self._nodes
+            move, score = self._search_root(game, player_name, opponent, depth, best_move)
+            if self._stopped and depth > 1:
+                break
+            best_move, best_score, depth_reached = move, score, depth
+            iteration_nodes.append(self._nodes - nodes_before)
+            if self._stopped or abs(score) >= WIN_SCORE - self._max_depth:
+                break
+
+        branching = None
+        if len(iteration_nodes) >= 2 and iteration_nodes[-2]:
+            branching = iteration_nodes[-1] / iteration_nodes[-2]
+        self._stats = {"nodes": self._nodes,
+                       "depth": depth_reached,
+                       "score": best_score,
+                       "seconds": time.perf_counter() - start,
+                       "tt_probes": self._tt_probes,
+                       "tt_hits": self._tt_hits,
+                       "tt_hit_rate": self._tt_hits / self._tt_probes if self._tt_probes else 0.0,
+                       "tt_used": self._table_used,
+                       "tt_size": len(self._table),
+                       "iteration_nodes": iteration_nodes,
+                       "effective_branching_factor": branching}
+        return best_move
+
+    def get_stats(self):
+        """Returns the statistics of the last search as a dictionary."""
+        return dict(self._stats)
+
+    def clear_table(self):
+        """Empties the transposition table."""
+        self._table = [None] * len(self._table)
+        self._table_used = 0
+
+    def _search_root(self, game, player, opponent, depth, previous_best):
+        """
+        Helper function for choose_move that searches every root move to the given depth.
+        :return: A tuple of the best move and its score. If the search ran out of time the best move so far is returned.
+        """
+        moves = self._ordered_moves(game, player, previous_best)
+        best_move, best_score = (moves[0], -WIN_SCORE) if moves else (None, -WIN_SCORE)
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        for move in moves:
+            score = self._score_move(game, player, opponent, move, depth, alpha, beta, 0)
+            if self._stopped:
+                break
+            if score > best_score or move is moves[0]:
+                best_move, best_score = move, score
+            alpha = max(alpha, score)
+        # A search cut short by the time limit did not score every move, so its result is not exact
+        if not self._stopped:
+            self._store(self._key(game, player), depth, best_score, EXACT, best_move)
+        return best_move, best_score
+
+    def _score_move(self, game, player, opponent, move, depth, alpha, beta, ply):
+        """
+        Helper function that makes a move, scores it for the player who made it, and takes it back. A move that
+        make_move rejects scores below every other move and is not taken back.
+        """
+        coordinates, direction = move
+        if not game.make_move(player, coordinates, direction):
+            return -WIN_SCORE - 1
+        if game.get_winner() is not None:
+            score = WIN_SCORE - ply - 1
+        else:
+            score = -self._negamax(game, opponent, player, depth - 1, -beta, -alpha, ply + 1)
+        game.unmake_move()
+        return score
+
+    def _negamax(self, game, player, opponent, depth, alpha, beta, ply):
+        """
+        Helper function for the alpha-beta search.
+        :return: The score of the position for the player to move
+        """
+        self._nodes += 1
+        if not self._nodes & 127 and time.perf_counter() > self._deadline:
+            self._stopped = True
+        if self._stopped:
+            return 0
+        if depth <= 0:
+            return self._evaluate(game, player, opponent)
+
+        # Probe transposition table
+        key = self._key(game, player)
+        self._tt_probes += 1
+        entry = self._table[key & self._table_mask]
+        table_move = None
+        if entry is not None and entry[0] == key:
+            self._tt_hits += 1
+            table_move = entry[4]
+            if entry[1] >= depth:
+                score = _from_table(entry[2], ply)
+                if entry[3] == EXACT:
+                    return score
+                if entry[3] == LOWER and score >= beta:
+                    return score
+                if entry[3] == UPPER and score <= alpha:
+                    return score
+
+        moves = self._ordered_moves(game, player, table_move)
+        if not moves:
+            return -(WIN_SCORE - ply)
+
+        original_alpha, best_score, best_move = alpha, -WIN_SCORE - 1, None
+        for move in moves:
+            score = self._score_move(game, player, opponent, move, depth, alpha, beta, ply)
+            if self._stopped:
+                return 0
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._store(key, depth, _to_table(best_score, ply), flag, best_move)
+        return best_score
+
+    def _ordered_moves(self, game, player, first_move):
+        """
+        Helper function that returns the player's legal moves with the given move first, then captures, then pushes
+        whose marble is closest to the edge it is pushed toward.
+        """
+        last = game.get_setup().size - 1
+
+        def order(move):
+            (row, column), direction = move
+            captures = game._push(row, column, direction)[2] is not None
+            if direction == "F":
+                distance = row
+            elif direction == "B":
+                distance = last - row
+            elif direction == "L":
+                distance = column
+            else:
+                distance = last - column
+            return move != first_move, not captures, distance
+        return sorted(game.legal_moves(player), key=order)
+
+    def _evaluate(self, game, player, opponent):
+        """Helper function that scores a position for the player by captured red marbles and remaining marbles."""
+        white, black, _ = game.get_marble_count()
+        remaining = {"W": white, "B": black}
+        reds = game.get_captured(player) - game.get_captured(opponent)
+        marbles = remaining[self._colors[player]] - remaining[self._colors[opponent]]
+        return RED_WEIGHT * reds + MARBLE_WEIGHT * marbles
+
+    def _key(self, game, player):
+        """
+        Helper function that returns the transposition table key of a position, the captured marbles of both players,
+        and the player to move. The same board with a different number of captures is scored differently.
+        """
+        key = game.position_hash()
+        banks = game._player1_bank + game._player2_bank
+        key ^= sum(count * bank_key for count, bank_key in zip(banks, _BANK_KEYS)) & _KEY_MASK
+        return key ^ _SIDE_KEY if player == self._second_player else key
+
+    def _store(self, key, depth, score, flag, move):
+        """
+        Helper function that stores a search result. Win and loss scores are stored by their distance from the
+        position, not from the root (see _to_table). A slot is replaced when it is empty, was filled by an earlier
+        search, or holds a result that is not deeper than the new one.
+        """
+        index = key & self._table_mask
+        entry = self._table[index]
+        if entry is None:
+            self._table_used += 1
+        if entry is None or entry[5] != self._generation or depth >= entry[1]:
+            self._table[index] = (key, depth, score, flag, move, self._generation)
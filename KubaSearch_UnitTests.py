@@ -0,0 +1,81 @@
+import unittest
+from KubaBenchmark import WINNING_GAME
+from KubaGame import KubaGame
+from KubaSearch import EXACT, WIN_SCORE, SearchPlayer, _from_table, _to_table
+
+
+class UnitTests(unittest.TestCase):
+    def test_choose_move_leaves_game_unchanged(self):
+        """Test that the search returns a legal move and takes back every move it tried."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        player = SearchPlayer(time_limit=10, max_depth=3)
+        move = player.choose_move(game, "PlayerA")
+        self.assertIn(move, game.legal_moves("PlayerA"))
+        self.assertEqual(game.get_current_turn(), None)
+        self.assertEqual(game.get_marble_count(), (8, 8, 13))
+        self.assertFalse(game.unmake_move())
+        self.assertTrue(game.make_move("PlayerA", *move))
+
+        # Searching for the wrong player or in a finished game leaves the moves already made alone
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        for move in WINNING_GAME[:4]:
+            self.assertTrue(game.make_move(*move))
+        position = game.position_hash()
+        self.assertRaises(ValueError, player.choose_move, game, "PlayerB")
+        self.assertEqual((game.position_hash(), game.get_current_turn()), (position, "PlayerA"))
+        for move in WINNING_GAME[4:]:
+            self.assertTrue(game.make_move(*move))
+        self.assertRaises(ValueError, player.choose_move, game, "PlayerB")
+        self.assertTrue(game.unmake_move())
+
+    def test_finds_winning_capture(self):
+        """Test that the search captures the seventh red marble."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        for move in WINNING_GAME[:-1]:
+            self.assertTrue(game.make_move(*move))
+        player = SearchPlayer(time_limit=10, max_depth=4)
+        self.assertEqual(player.choose_move(game, "PlayerA"), ((4, 3), "B"))
+        self.assertEqual(player.get_stats()["depth"], 1)
+
+    def test_stats_and_bounded_table(self):
+        """Test the search statistics and that the transposition table never grows."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        player = SearchPlayer(time_limit=10, max_depth=4, table_bits=6)
+        self.assertTrue(game.make_move("PlayerA", *player.choose_move(game, "PlayerA")))
+        self.assertTrue(game.make_move("PlayerB", *player.choose_move(game, "PlayerB")))
+        stats = player.get_stats()
+        self.assertEqual(stats["depth"], 4)
+        self.assertEqual(len(stats["iteration_nodes"]), 4)
+        self.assertEqual(stats["nodes"], sum(stats["iteration_nodes"]))
+        self.assertGreater(stats["tt_hits"], 0)
+        self.assertTrue(0 < stats["tt_hit_rate"] <= 1)
+        self.assertEqual(stats["tt_size"], 64)
+        self.assertLessEqual(stats["tt_used"], 64)
+        self.assertEqual(len(player._table), 64)
+        self.assertGreater(stats["effective_branching_factor"], 0)
+
+    def test_time_limit(self):
+        """Test that the search stops at its time budget and still returns a move."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        player = SearchPlayer(time_limit=0.05)
+        self.assertIn(player.choose_move(game, "PlayerB"), game.legal_moves("PlayerB"))
+        self.assertLess(player.get_stats()["seconds"], 1)
+
+    def test_table_key_and_win_scores(self):
+        """Test that the table key depends on the captured marbles and that win scores are stored by distance."""
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        player = SearchPlayer(table_bits=6)
+        player.choose_move(game, "PlayerA")
+        for move in WINNING_GAME[:7]:
+            self.assertTrue(game.make_move(*move))
+        key = player._key(game, "PlayerB")
+        game._player1_bank[0], game._player2_bank[0] = game._player2_bank[0], game._player1_bank[0]
+        self.assertNotEqual(player._key(game, "PlayerB"), key)
+        self.assertNotEqual(player._key(game, "PlayerA"), player._key(game, "PlayerB"))
+
+        # A win on the third move from a position five moves deep is also a win on the third move from one move deep
+        player._store(key, 64, _to_table(WIN_SCORE - 7 - 1, 5), EXACT, None)
+        self.assertEqual(player._table[key & 63][2], WIN_SCORE - 3)
+        self.assertEqual(_from_table(player._table[key & 63][2], 1), WIN_SCORE - 3 - 1)
+        self.assertEqual(_from_table(_to_table(-(WIN_SCORE - 4), 4), 2), -(WIN_SCORE - 2))
+        self.assertEqual(_from_table(_to_table(250, 4), 2), 250)
@@ -0,0 +1,243 @@
+# Author: Andy Phung
+# Date: 10/18/2026
+# Description: Class KubaServer hosts many KubaGame sessions over TCP with asyncio. Clients send one JSON object per
+#              line and receive one JSON object per line back. Moves can be sent as coordinates and a direction or
+#              as a one-byte KubaRecord move code, and turns are enforced with get_current_turn. Sessions keep no
+#              undo history, the number of sessions is capped, and the memory of a session is measured with
+#              deep_sizeof. load_test plays random games against a running server and reports move latency and
+#              sessions per GB.
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from KubaGame import KubaGame
+from KubaRecord import decode_move, encode_move
+
+GIGABYTE = 2 ** 30
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Measures the memory of an object and everything it refers to through slots, dictionaries, lists, and tuples.
+    :param obj: The object to measure
+    :param seen: A set of ids of objects that were already counted
+    :return: The size in bytes as an integer
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        for name in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, name):
+                size += deep_sizeof(getattr(obj, name), seen)
+        if hasattr(obj, "__dict__"):
+            size += deep_sizeof(obj.__dict__, seen)
+    return size
+
+
+class KubaServer:
+    """Represents a server that hosts KubaGame sessions."""
+    def __init__(self, max_sessions=100000):
+        """
+        Creates a server without sessions.
+        :param max_sessions: The largest number of sessions that can be open at once
+        """
+        self._sessions = {}
+        self._next_session = 1
+        self._max_sessions = max_sessions
+
+    def handle_message(self, message):
+        """
+        Handles one request.
+        :param message: A dictionary with an "op" of "new", "move", "state", "close", or "stats"
+        :return: The response as a dictionary with "ok" set to True or False
+        """
+        if not isinstance(message, dict):
+            return {"ok": False, "error": "bad message"}
+        op = message.get("op")
+        if op == "new":
+            return self._new_session(message)
+        if op == "stats":
+            return self._stats()
+        game = self._sessions.get(message.get("session"))
+        if game is None:
+            return {"ok": False, "error": "unknown session"}
+        if op == "move":
+            return self._move(game, message)
+        if op == "state":
+            return self._state(game)
+        if op == "close":
+            del self._sessions[message["session"]]
+            return {"ok": True}
+        return {"ok": False, "error": "unknown op"}
+
+    def _new_session(self, message):
+        """Helper function for handle_message that starts a game between the message's player1 and player2."""
+        if len(self._sessions) >= self._max_sessions:
+            return {"ok": False, "error": "server full"}
+        player1, player2 = tuple(message["player1"]), tuple(message["player2"])
+        if {player1[1], player2[1]} != {"W", "B"} or player1[0] == player2[0]:
+            return {"ok": False, "error": "players need different names and the colors W and B"}
+        session = self._next_session
+        self._next_session += 1
+        self._sessions[session] = KubaGame(player1, player2)
+        return {"ok": True, "session": session}
+
+    def _move(self, game, message):
+        """Helper function for handle_message that makes a move given by coordinates or by a move code."""
+        player_name = message.get("player")
+        current_player = game.get_current_turn()
+        if current_player is not None and player_name != current_player:
+            return {"ok": False, "error": "not your turn", "turn": current_player}
+        if "code" in message:
+            coordinates, direction = decode_move(message["code"])
+        else:
+            coordinates, direction = (message["row"], message["column"]), message["direction"]
+        if not game.make_move(player_name, coordinates, direction):
+            return {"ok": False, "error": "illegal move", "turn": game.get_current_turn()}
+        game.forget_history()
+        return {"ok": True, "turn": game.get_current_turn(), "winner": game.get_winner()}
+
+    def _state(self, game):
+        """Helper function for handle_message that describes a game."""
+        size = game.get_setup().size
+        board = ["".join(game.get_marble((row, column)) for column in range(size)) for row in range(size)]
+        players = (game._player1[0], game._player2[0])
+        return {"ok": True, "board": board, "turn": game.get_current_turn(), "winner": game.get_winner(),
+                "captured": {name: game.get_captured(name) for name in players},
+                "marble_count": game.get_marble_count()}
+
+    def _stats(self, sample=100):
+        """Helper function for handle_message that reports the session count and average memory per session."""
+        games = list(self._sessions.values())[:sample]
+        # Board setups are shared between sessions, so they are not counted
+        shared = {id(game.get_setup()) for game in games}
+        average = sum(deep_sizeof(game, set(shared)) for game in games) / len(games) if games else 0
+        return {"ok": True, "sessions": len(self._sessions), "bytes_per_session": average}
+
+    async def handle_connection(self, reader, writer):
+        """Answers each JSON line from a client until the client disconnects."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = self.handle_message(json.loads(line))
+                except (ValueError, KeyError, TypeError, IndexError) as error:
+                    response = {"ok": False, "error": "bad message: %s" % error}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Starts listening and returns the asyncio server. Port 0 picks a free port."""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def _request(reader, writer, message):
+    """Sends one request and waits for its response."""
+    writer.write(json.dumps(message).encode("utf-8") + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def _play_sessions(host, port, sessions, moves, rng, latencies):
+    """Opens one connection and plays random moves round-robin across its sessions, timing every move."""
+    reader, writer = await asyncio.open_connection(host, port)
+    players = (("PlayerA", "W"), ("PlayerB", "B"))
+    games = {}
+    for _ in range(sessions):
+        response = await _request(reader, writer, {"op": "new", "player1": players[0], "player2": players[1]})
+        games[response["session"]] = KubaGame(*players)
+    for _ in range(moves):
+        for session, game in games.items():
+            if game.get_winner() is not None:
+                continue
+            player_name = game.get_current_turn() or players[0][0]
+            move = rng.choice(game.legal_moves(player_name))
+            game.make_move(player_name, *move)
+            game.forget_history()
+            start = time.perf_counter()
+            response = await _request(reader, writer, {"op": "move", "session": session, "player": player_name,
+                                                       "code": encode_move(*move)})
+            latencies.append(time.perf_counter() - start)
+            if not response["ok"]:
+                raise RuntimeError("Server rejected move %s: %s" % (move, response["error"]))
+    return reader, writer, list(games)
+
+
+async def load_test(host, port, sessions=1000, moves=50, connections=10, seed=0):
+    """
+    Plays random games on a running server.
+    :param host: The server host name
+    :param port: The server port
+    :param sessions: The number of sessions to open
+    :param moves: The number of moves to play in each session, unless it ends first
+    :param connections: The number of client connections that share the sessions
+    :param seed: The random seed as an integer
+    :return: A dictionary with the number of moves, the p50 and p99 move latency in milliseconds, the server's bytes
+             per session, and the number of such sessions that fit in a GB
+    """
+    latencies = []
+    shares = [sessions // connections + (index < sessions % connections) for index in range(connections)]
+    clients = await asyncio.gather(*(_play_sessions(host, port, share, moves, random.Random(seed * 1000 + index),
+                                                    latencies) for index, share in enumerate(shares) if share))
+    reader, writer, _ = clients[0]
+    stats = await _request(reader, writer, {"op": "stats"})
+    for reader, writer, opened in clients:
+        for session in opened:
+            await _request(reader, writer, {"op": "close", "session": session})
+        writer.close()
+        await writer.wait_closed()
+
+    latencies.sort()
+    bytes_per_session = stats["bytes_per_session"]
+    return {"moves": len(latencies),
+            "p50_ms": 1000 * latencies[len(latencies) // 2] if latencies else None,
+            "p99_ms": 1000 * latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] if latencies else None,
+            "bytes_per_session": bytes_per_session,
+            "sessions_per_gb": GIGABYTE / bytes_per_session if bytes_per_session else None}
+
+
+async def _serve(host, port, max_sessions):
+    """Runs a server until it is interrupted."""
+    server = await KubaServer(max_sessions).start(host, port)
+    print("Serving on %s:%d" % server.sockets[0].getsockname()[:2])
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    """Runs the server or the load test client from the command line."""
+    parser = argparse.ArgumentParser(description="Host KubaGame sessions or load test a host.")
+    parser.add_argument("command", choices=["serve", "loadtest"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-sessions", type=int, default=100000)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--moves", type=int, default=50)
+    parser.add_argument("--connections", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(_serve(args.host, args.port, args.max_sessions))
+    else:
+        report = asyncio.run(load_test(args.host, args.port, args.sessions, args.moves, args.connections))
+        for key, value in report.items():
+            print("%-18s %s" % (key, value))
+
+
+if __name__ == '__main__':
+    main()
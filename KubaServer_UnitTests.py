@@ -0,0 +1,76 @@
+import asyncio
+import json
+import unittest
+from KubaGame import KubaGame
+from KubaServer import KubaServer, deep_sizeof, load_test
+
+
+class UnitTests(unittest.TestCase):
+    def test_handle_message(self):
+        """Test sessions, turn enforcement, and both move message forms without a socket."""
+        server = KubaServer(max_sessions=2)
+        new = {"op": "new", "player1": ["PlayerA", "W"], "player2": ["PlayerB", "B"]}
+        session = server.handle_message(new)["session"]
+        self.assertTrue(server.handle_message(new)["ok"])
+        self.assertEqual(server.handle_message(new), {"ok": False, "error": "server full"})
+
+        move = {"op": "move", "session": session, "player": "PlayerA", "row": 6, "column": 5, "direction": "F"}
+        self.assertEqual(server.handle_message(move), {"ok": True, "turn": "PlayerB", "winner": None})
+        self.assertEqual(server.handle_message(move)["error"], "not your turn")
+        bad = {"op": "move", "session": session, "player": "PlayerB", "row": 6, "column": 5, "direction": "F"}
+        self.assertEqual(server.handle_message(bad)["error"], "illegal move")
+        code = {"op": "move", "session": session, "player": "PlayerB", "code": (0 * 7 + 6) * 4 + 1}    # (0, 6) "B"
+        self.assertTrue(server.handle_message(code)["ok"])
+
+        state = server.handle_message({"op": "state", "session": session})
+        self.assertEqual(state["board"][0], "WWXXXBX")
+        self.assertEqual(state["turn"], "PlayerA")
+        self.assertEqual(state["marble_count"], (8, 8, 13))
+        self.assertTrue(server.handle_message({"op": "close", "session": session})["ok"])
+        self.assertEqual(server.handle_message({"op": "state", "session": session})["error"], "unknown session")
+        self.assertEqual(server.handle_message({"op": "stats"})["sessions"], 1)
+
+    def test_session_memory_is_bounded(self):
+        """Test that a session does not grow as moves are made."""
+        server = KubaServer()
+        session = server.handle_message({"op": "new", "player1": ["A", "W"], "player2": ["B", "B"]})["session"]
+        mirror = KubaGame(("A", "W"), ("B", "B"))
+        # The board setup is shared between sessions, so it is not counted, as in the stats message
+        shared = id(server._sessions[session].get_setup())
+        player_name, start = "A", None
+        for count in range(42):
+            # The first two moves replace the starting board and hashes that the session shared with the setup
+            if count == 2:
+                start = deep_sizeof(server._sessions[session], {shared})
+            move = mirror.legal_moves(player_name)[0]
+            mirror.make_move(player_name, *move)
+            response = server.handle_message({"op": "move", "session": session, "player": player_name,
+                                              "row": move[0][0], "column": move[0][1], "direction": move[1]})
+            self.assertTrue(response["ok"])
+            player_name = mirror.get_current_turn()
+        self.assertLess(deep_sizeof(server._sessions[session], {shared}), start + 200)
+
+    def test_tcp(self):
+        """Test the server over a local TCP socket, including the load test client."""
+        async def run():
+            server = await KubaServer().start()
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"not json\n[1, 2]\n" + json.dumps({"op": "stats"}).encode() + b"\n")
+            await writer.drain()
+            first, not_object = json.loads(await reader.readline()), json.loads(await reader.readline())
+            second = json.loads(await reader.readline())
+            writer.close()
+            report = await load_test("127.0.0.1", port, sessions=6, moves=15, connections=3)
+            server.close()
+            await server.wait_closed()
+            return first, not_object, second, report
+
+        first, not_object, second, report = asyncio.run(run())
+        self.assertFalse(first["ok"])
+        self.assertEqual(not_object, {"ok": False, "error": "bad message"})
+        self.assertEqual(second, {"ok": True, "sessions": 0, "bytes_per_session": 0})
+        self.assertEqual(report["moves"], 90)
+        self.assertGreater(report["p99_ms"], 0)
+        self.assertGreaterEqual(report["p99_ms"], report["p50_ms"])
+        self.assertGreater(report["sessions_per_gb"], 100000)
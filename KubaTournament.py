@@ -0,0 +1,181 @@
+# Author: Andy Phung
+# Date: 10/18/2026
+# Description: Plays tournaments between KubaGame player policies across a process pool. A policy is a picklable
+#              callable that takes a game, the player name, and a random.Random object and returns a legal
+#              (coordinates, direction) move. Each game is seeded from the tournament seed and its index, so any
+#              single game can be replayed with play_game. Results are streamed back to a TournamentStats
+#              aggregator as games finish instead of being collected in memory.
+
+import argparse
+import multiprocessing
+import random
+import time
+from collections import namedtuple
+from KubaGame import KubaGame
+from KubaSearch import SearchPlayer
+
+PLAYER1 = ("Player1", "W")
+PLAYER2 = ("Player2", "B")
+
+GameResult = namedtuple("GameResult", ["index", "winner", "length", "captured", "marble_count"])
+
+
+def random_policy(game, player_name, rng):
+    """Returns a random legal move for the player."""
+    return rng.choice(game.legal_moves(player_name))
+
+
+def greedy_policy(game, player_name, rng):
+    """
+    Returns the legal move that wins or captures the most after one move, breaking ties at random. Raises ValueError
+    if make_move rejects every move of the player, for example because it is not the player's turn.
+    """
+    best_moves, best_score = [], None
+    for coordinates, direction in game.legal_moves(player_name):
+        before = game.get_marble_count()
+        if not game.make_move(player_name, coordinates, direction):
+            continue
+        after = game.get_marble_count()
+        score = (game.get_winner() == player_name, before[2] - after[2], sum(before[:2]) - sum(after[:2]))
+        game.unmake_move()
+        if best_score is None or score > best_score:
+            best_moves, best_score = [(coordinates, direction)], score
+        elif score == best_score:
+            best_moves.append((coordinates, direction))
+    if not best_moves:
+        raise ValueError("%s has no move to make" % player_name)
+    return rng.choice(best_moves)
+
+
+def search_policy(game, player_name, rng):
+    """Returns the move chosen by a depth 2 alpha-beta search. A fresh table keeps every game reproducible."""
+    return SearchPlayer(time_limit=60, max_depth=2, table_bits=12).choose_move(game, player_name)
+
+
+POLICIES = {"random": random_policy, "greedy": greedy_policy, "search": search_policy}
+
+
+def game_seed(seed, index):
+    """Returns the random seed of one game of a tournament."""
+    return seed * 2 ** 32 + index
+
+
+def play_game(index, seed, policy1, policy2, max_moves=200):
+    """
+    Plays one game of a tournament. Player1 makes the first move in even numbered games and Player2 in odd ones.
+    :param index: The game number as an integer
+    :param seed: The tournament seed as an integer
+    :param policy1: The policy of Player1
+    :param policy2: The policy of Player2
+    :param max_moves: The number of moves after which an unfinished game is stopped without a winner
+    :return: A GameResult with the winner's name (None if unfinished), the number of moves, the red marbles captured
+             by (Player1, Player2), and the (W, B, R) marble count at the end of the game
+    """
+    rng = random.Random(game_seed(seed, index))
+    game = KubaGame(PLAYER1, PLAYER2)
+    policies = {PLAYER1[0]: policy1, PLAYER2[0]: policy2}
+    player_name = PLAYER1[0] if index % 2 == 0 else PLAYER2[0]
+    length = 0
+    while game.get_winner() is None and length < max_moves:
+        coordinates, direction = policies[player_name](game, player_name, rng)
+        if not game.make_move(player_name, coordinates, direction):
+            raise ValueError("%s policy made an illegal move %s %s" % (player_name, coordinates, direction))
+        length += 1
+        player_name = game.get_current_turn()
+    captured = (game.get_captured(PLAYER1[0]), game.get_captured(PLAYER2[0]))
+    return GameResult(index, game.get_winner(), length, captured, game.get_marble_count())
+
+
+class TournamentStats:
+    """Represents running totals of a tournament that are updated one game result at a time."""
+    def __init__(self):
+        """Creates empty tournament totals."""
+        self.games = 0
+        self.wins = {PLAYER1[0]: 0, PLAYER2[0]: 0, None: 0}
+        self.total_length = 0
+        self.total_captured = [0, 0]
+        self.total_marbles = [0, 0, 0]
+
+    def add(self, result):
+        """Adds one GameResult to the totals."""
+        self.games += 1
+        self.wins[result.winner] += 1
+        self.total_length += result.length
+        for player in range(2):
+            self.total_captured[player] += result.captured[player]
+        for marble in range(3):
+            self.total_marbles[marble] += result.marble_count[marble]
+
+    def summary(self):
+        """Returns the win rates, unfinished rate, and averages per game as a dictionary."""
+        games = self.games or 1
+        return {"games": self.games,
+                "player1_win_rate": self.wins[PLAYER1[0]] / games,
+                "player2_win_rate": self.wins[PLAYER2[0]] / games,
+                "unfinished_rate": self.wins[None] / games,
+                "average_length": self.total_length / games,
+                "average_captured": tuple(total / games for total in self.total_captured),
+                "average_marble_count": tuple(total / games for total in self.total_marbles)}
+
+
+_worker_args = None
+
+
+def _init_worker(seed, policy1, policy2, max_moves):
+    """Stores the tournament settings in a pool worker so they are only sent once per process."""
+    global _worker_args
+    _worker_args = (seed, policy1, policy2, max_moves)
+
+
+def _play_indexed_game(index):
+    """Plays one game in a pool worker."""
+    seed, policy1, policy2, max_moves = _worker_args
+    return play_game(index, seed, policy1, policy2, max_moves)
+
+
+def run_tournament(policy1, policy2, games, seed=0, workers=None, max_moves=200, chunksize=16):
+    """
+    Plays a tournament and yields each GameResult as soon as it finishes, in no particular order.
+    :param policy1: The policy of Player1
+    :param policy2: The policy of Player2
+    :param games: The number of games as an integer
+    :param seed: The tournament seed as an integer
+    :param workers: The number of worker processes. Defaults to the number of CPUs. With 1 worker the games are
+                    played in the calling process.
+    :param max_moves: The number of moves after which an unfinished game is stopped without a winner
+    :param chunksize: The number of games handed to a worker at a time
+    """
+    workers = workers or multiprocessing.cpu_count()
+    if workers == 1:
+        for index in range(games):
+            yield play_game(index, seed, policy1, policy2, max_moves)
+        return
+    with multiprocessing.Pool(workers, _init_worker, (seed, policy1, policy2, max_moves)) as pool:
+        for result in pool.imap_unordered(_play_indexed_game, range(games), chunksize):
+            yield result
+
+
+def main():
+    """Runs a tournament from the command line and prints its summary."""
+    parser = argparse.ArgumentParser(description="Play a KubaGame tournament between two policies.")
+    parser.add_argument("policy1", choices=sorted(POLICIES))
+    parser.add_argument("policy2", choices=sorted(POLICIES))
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-moves", type=int, default=200)
+    args = parser.parse_args()
+
+    stats = TournamentStats()
+    start = time.perf_counter()
+    for result in run_tournament(POLICIES[args.policy1], POLICIES[args.policy2], args.games, args.seed,
+                                 args.workers, args.max_moves):
+        stats.add(result)
+    seconds = time.perf_counter() - start
+    for key, value in stats.summary().items():
+        print("%-22s %s" % (key, value))
+    print("%-22s %.1f" % ("games_per_second", stats.games / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import random
+import unittest
+from KubaGame import KubaGame
+from KubaTournament import (PLAYER1, PLAYER2, TournamentStats, greedy_policy, play_game, random_policy,
+                            run_tournament, search_policy)
+
+
+class UnitTests(unittest.TestCase):
+    def test_play_game_is_reproducible(self):
+        """Test that a game can be replayed from the tournament seed and its index."""
+        first = play_game(5, 42, random_policy, greedy_policy)
+        self.assertEqual(play_game(5, 42, random_policy, greedy_policy), first)
+        self.assertNotEqual(play_game(6, 42, random_policy, greedy_policy)[1:], first[1:])
+        self.assertIn(first.winner, (PLAYER1[0], PLAYER2[0], None))
+        self.assertLessEqual(first.length, 200)
+
+    def test_greedy_policy_wrong_turn(self):
+        """Test that asking the greedy policy for the wrong player's move leaves the game unchanged."""
+        game = KubaGame(PLAYER1, PLAYER2)
+        self.assertTrue(game.make_move(PLAYER1[0], (6, 6), "F"))
+        position = game.position_hash()
+        self.assertRaises(ValueError, greedy_policy, game, PLAYER1[0], random.Random(1))
+        self.assertEqual((game.position_hash(), game.get_current_turn()), (position, PLAYER2[0]))
+        self.assertTrue(game.unmake_move())
+
+    def test_search_policy(self):
+        """Test that the search policy plays reproducible games and beats random play."""
+        first = play_game(1, 9, search_policy, random_policy, max_moves=80)
+        self.assertEqual(play_game(1, 9, search_policy, random_policy, max_moves=80), first)
+        self.assertEqual(first.winner, PLAYER1[0])
+
+    def test_max_moves(self):
+        """Test that unfinished games stop at the move limit without a winner."""
+        result = play_game(0, 1, random_policy, random_policy, max_moves=3)
+        self.assertEqual((result.winner, result.length), (None, 3))
+        self.assertEqual(result.marble_count, (8, 8, 13))
+
+    def test_run_tournament(self):
+        """Test that a pooled tournament streams the same results as playing each game in turn."""
+        pooled = sorted(run_tournament(greedy_policy, random_policy, 12, seed=3, workers=2, max_moves=60,
+                                       chunksize=2))
+        serial = [play_game(index, 3, greedy_policy, random_policy, 60) for index in range(12)]
+        self.assertEqual(pooled, serial)
+
+        stats = TournamentStats()
+        for result in pooled:
+            stats.add(result)
+        summary = stats.summary()
+        self.assertEqual(summary["games"], 12)
+        self.assertAlmostEqual(summary["player1_win_rate"] + summary["player2_win_rate"] +
+                               summary["unfinished_rate"], 1.0)
+        self.assertEqual(summary["average_length"], sum(result.length for result in serial) / 12)